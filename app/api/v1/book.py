@@ -1,63 +1,115 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Request
 from typing import List
 from ...models.schemas import (
     AppointmentRequest, 
     AppointmentResponse,
-    AppointmentCallResult
+    AppointmentCallResult,
+    AppointmentDoctorRef,
 )
 from ...services.telephony import get_twilio_service
+from twilio.base.exceptions import TwilioException, TwilioRestException
 from ...config import settings
-from urllib.parse import urlparse
+from .telephony import CallRequest, get_public_url, place_call
+import asyncio
 import logging
-import httpx
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Booking-call prompt, parsed once; patient fields are filled per request and
+# doctor fields per call
+_SYSTEM_INSTRUCTION_TEMPLATE = """You are SmarterDoc Agent, a virtual assistant that helps patients schedule appointments with doctors.
 
-def get_public_url(request: Request) -> str:
-    """
-    Get the public URL for this server.
-    Uses X-Forwarded-Host header if available (for ngrok/Cloud Run).
-    For local development, uses localhost.
+                You are calling Dr. {doctor_name}, who is a {doctor_specialty} specialist.
+
+                Patient Information:
+                - Name: {patient_name}
+                - Phone: {phone}
+                - Date of Birth: {birth}
+                - Gender: {gender}
+                - Preferred Appointment Time: {appointment_time}
+                - Reason for Visit: {reason}
+
+                Your task:
+                1. Greet the doctor politely and introduce yourself
+                2. Explain that you're calling on behalf of the patient {patient_name}
+                3. Request to schedule an appointment around the preferred time: {appointment_time}
+                4. Mention the reason for the visit: {reason}
+                5. Confirm the appointment details with the doctor
+                6. Thank the doctor for their time
+
+                Maintain a warm, respectful, and professional tone throughout the conversation."""
+
+
+# Expected ways for a single call to fail: Twilio API/client errors, network
+# errors (OSError), and bad call details such as a missing caller number
+# (ValueError, including request validation). Anything else is a bug and
+# propagates instead of being reported as a failed call.
+_CALL_ERRORS = (TwilioException, OSError, ValueError)
+
+_MOCK_CALL_MESSAGE = "Mock call initiated to {name} for appointment on {time}"
+
+async def _call_doctor(
+    public_url: str,
+    to_number: str,
+    doctor: AppointmentDoctorRef,
+    patient_fields: dict,
+) -> AppointmentCallResult:
     """
-    # Check for forwarded host (ngrok, Cloud Run, etc.)
-    forwarded_host = request.headers.get("x-forwarded-host")
-    forwarded_proto = request.headers.get("x-forwarded-proto", "https")
-    
-    if forwarded_host:
-        # For ngrok, use the forwarded host with https
-        if "ngrok" in forwarded_host or "ngrok-free" in forwarded_host:
-            return f"https://{forwarded_host}"
-        # For Cloud Run, always use https
-        if ".run.app" in forwarded_host:
-            return f"https://{forwarded_host}"
-        return f"{forwarded_proto}://{forwarded_host}"
-    
-    # Fallback to request host
-    host = request.headers.get("host", "localhost:8080")
-    
-    # For ngrok domains, always use https
-    if "ngrok" in host or "ngrok-free" in host:
-        return f"https://{host}"
-    
-    # For local development, use localhost
-    if "localhost" in host or "127.0.0.1" in host:
-        return f"http://localhost:8080"
+    Place one booking call through place_call, the /call endpoint's implementation.
     
-    # For Cloud Run domains, always use https
-    if ".run.app" in host:
-        return f"https://{host}"
-    
-    # Default scheme detection
-    scheme = "https" if "443" in host else "http"
-    return f"{scheme}://{host}"
+    Expected call failures (_CALL_ERRORS) are returned as a "failed"
+    AppointmentCallResult so one doctor's error does not fail the request.
+    """
+    try:
+        # Construct system instruction with appointment details
+        system_instruction = _SYSTEM_INSTRUCTION_TEMPLATE.format_map({
+            **patient_fields,
+            "doctor_name": doctor.name,
+            "doctor_specialty": doctor.specialty,
+        })
+
+        logger.info("Initiating call to %s for %s", to_number, doctor.name)
+        logger.debug("System instruction length: %d chars", len(system_instruction))
+        
+        result = await place_call(
+            CallRequest(
+                to=to_number,
+                voice=settings.VERTEX_LIVE_VOICE,
+                system_instruction=system_instruction,
+            ),
+            public_url,
+        )
+        call_sid = result.call_sid
+        
+        logger.info("Successfully initiated call for %s: %s", doctor.name, call_sid)
+        return AppointmentCallResult(
+            doctor_name=doctor.name,
+            doctor_specialty=doctor.specialty,
+            call_status="success",
+            call_sid=call_sid,
+            message=f"Call initiated successfully. Call SID: {call_sid}"
+        )
+        
+    except _CALL_ERRORS as e:
+        if isinstance(e, TwilioRestException):
+            reason = f"Twilio API error {e.status} (code: {e.code}): {e.msg}"
+        else:
+            reason = f"{type(e).__name__}: {e}"
+        logger.error("Failed to call %s: %s", doctor.name, reason)
+        return AppointmentCallResult(
+            doctor_name=doctor.name,
+            doctor_specialty=doctor.specialty,
+            call_status="failed",
+            call_sid=None,
+            message=f"Failed to initiate call: {reason}"
+        )
 
 
 @router.post("/appointments", response_model=AppointmentResponse)
 async def create_appointment(req: AppointmentRequest, request: Request):
     """
-    Create appointments by calling doctors sequentially.
+    Create appointments by calling doctors concurrently.
     For each doctor in the list, initiate a phone call to book an appointment.
     
     Args:
@@ -66,11 +118,8 @@ async def create_appointment(req: AppointmentRequest, request: Request):
     Returns:
         AppointmentResponse with call results for each doctor
     """
-    logger.info(f"Creating appointment for {req.firstName} {req.lastName}")
-    logger.info(f"Number of doctors to call: {len(req.doctors)}")
-    
-    call_results: List[AppointmentCallResult] = []
-    successful_calls = 0
+    logger.info("Creating appointment for %s %s", req.firstName, req.lastName)
+    logger.info("Number of doctors to call: %d", len(req.doctors))
     
     # Get Twilio service
     twilio_service = get_twilio_service()
@@ -78,15 +127,17 @@ async def create_appointment(req: AppointmentRequest, request: Request):
     if not twilio_service.is_configured():
         logger.warning("Twilio not configured - using mock mode")
         # Mock response when Twilio is not configured
-        for doctor in req.doctors:
-            call_results.append(AppointmentCallResult(
+        call_results: List[AppointmentCallResult] = [
+            AppointmentCallResult(
                 doctor_name=doctor.name,
                 doctor_specialty=doctor.specialty,
                 call_status="success",
                 call_sid=f"MOCK_CALL_{doctor.npi}",
-                message=f"Mock call initiated to {doctor.name} for appointment on {req.appointmentTime}"
-            ))
-            successful_calls += 1
+                message=_MOCK_CALL_MESSAGE.format(name=doctor.name, time=req.appointmentTime)
+            )
+            for doctor in req.doctors
+        ]
+        successful_calls = len(call_results)
         
         return AppointmentResponse(
             status="success",
@@ -96,115 +147,60 @@ async def create_appointment(req: AppointmentRequest, request: Request):
             successful_calls=successful_calls
         )
     
-    # Real Twilio calls using /call API
+    # Real Twilio calls, placed in-process through the /call implementation
     # Get phone number from configuration
     to_number = settings.APPOINTMENT_PHONE_NUMBER
     
+    # Get public URL for the call's TwiML callback
+    public_url = get_public_url(request)
+    logger.info("Public URL: %s", public_url)
+    
+    # Patient details are the same for every doctor, so they are resolved once
+    patient_fields = {
+        "patient_name": f"{req.firstName} {req.lastName}",
+        "phone": req.phone,
+        "birth": req.birth,
+        "gender": req.gender,
+        "appointment_time": req.appointmentTime,
+        "reason": req.comment or "General consultation",
+    }
+    
+    # A doctor listed more than once (same NPI) is called only once; the repeats
+    # get a "duplicate" result so call_results still lines up with req.doctors
+    unique_doctors = {}
     for doctor in req.doctors:
-        try:
-            # Construct system instruction with appointment details
-            system_instruction = f"""You are SmarterDoc Agent, a virtual assistant that helps patients schedule appointments with doctors.
-
-                You are calling Dr. {doctor.name}, who is a {doctor.specialty} specialist.
-
-                Patient Information:
-                - Name: {req.firstName} {req.lastName}
-                - Phone: {req.phone}
-                - Date of Birth: {req.birth}
-                - Gender: {req.gender}
-                - Preferred Appointment Time: {req.appointmentTime}
-                - Reason for Visit: {req.comment or 'General consultation'}
-
-                Your task:
-                1. Greet the doctor politely and introduce yourself
-                2. Explain that you're calling on behalf of the patient {req.firstName} {req.lastName}
-                3. Request to schedule an appointment around the preferred time: {req.appointmentTime}
-                4. Mention the reason for the visit: {req.comment or 'General consultation'}
-                5. Confirm the appointment details with the doctor
-                6. Thank the doctor for their time
-
-                Maintain a warm, respectful, and professional tone throughout the conversation."""
-
-            logger.info(f"Initiating call to {to_number} for {doctor.name}")
-            logger.info(f"System instruction length: {len(system_instruction)} chars")
-            
-            # Get public URL for internal API call
-            public_url = get_public_url(request)
-            logger.info(f"Public URL: {public_url}")
-            
-            # Call the /call API instead of direct Twilio service
-            call_api_url = f"{public_url}/api/v1/telephony/call"
-            logger.info(f"Call API URL: {call_api_url}")
-            
-            call_payload = {
-                "to": to_number,
-                "voice": settings.VERTEX_LIVE_VOICE,
-                "system_instruction": system_instruction
-            }
-            
-            # Make HTTP request to /call API
-            # Dev-only: add ngrok forwarded headers IF NGROK_URL is configured
-            headers = {"Content-Type": "application/json"}
-            if getattr(settings, "NGROK_URL", None):
-                parsed = urlparse(settings.NGROK_URL)
-                if parsed.scheme and parsed.netloc:
-                    headers["x-forwarded-proto"] = parsed.scheme
-                    headers["x-forwarded-host"] = parsed.netloc
-                    logger.info(f"Injected forwarded headers for ngrok: proto={parsed.scheme}, host={parsed.netloc}")
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    call_api_url,
-                    json=call_payload,
-                    headers=headers,
-                    timeout=30.0
-                )
-                
-                logger.info(f"HTTP Response Status: {response.status_code}")
-                logger.info(f"HTTP Response Headers: {dict(response.headers)}")
-                
-                if response.status_code != 200:
-                    logger.error(f"HTTP Error {response.status_code}: {response.text}")
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Call API returned {response.status_code}: {response.text}"
-                    )
-                
-                result = response.json()
-            
-            # Extract call_sid from API response
-            call_sid = result.get("call_sid")
-            
-            call_results.append(AppointmentCallResult(
-                doctor_name=doctor.name,
-                doctor_specialty=doctor.specialty,
-                call_status="success",
-                call_sid=call_sid,
-                message=f"Call initiated successfully via /call API. Call SID: {call_sid}"
-            ))
-            successful_calls += 1
-            logger.info(f"Successfully initiated call for {doctor.name} via /call API: {call_sid}")
-            
-        except Exception as e:
-            logger.error(f"Failed to call {doctor.name}: {str(e)}")
-            call_results.append(AppointmentCallResult(
-                doctor_name=doctor.name,
-                doctor_specialty=doctor.specialty,
-                call_status="failed",
-                call_sid=None,
-                message=f"Failed to initiate call via /call API: {str(e)}"
-            ))
+        unique_doctors.setdefault(doctor.npi, doctor)
+    if len(unique_doctors) < len(req.doctors):
+        logger.info("Skipping %d duplicate doctor(s)", len(req.doctors) - len(unique_doctors))
+    
+    # Calls are independent, so they are placed concurrently
+    results_by_npi = dict(zip(unique_doctors, await asyncio.gather(*(
+        _call_doctor(public_url, to_number, doctor, patient_fields)
+        for doctor in unique_doctors.values()
+    ))))
+    call_results = [
+        results_by_npi[doctor.npi] if unique_doctors[doctor.npi] is doctor
+        else AppointmentCallResult(
+            doctor_name=doctor.name,
+            doctor_specialty=doctor.specialty,
+            call_status="duplicate",
+            call_sid=None,
+            message=f"Duplicate of an earlier entry for NPI {doctor.npi}; no separate call placed"
+        )
+        for doctor in req.doctors
+    ]
+    successful_calls = sum(1 for result in results_by_npi.values() if result.call_status == "success")
     
-    # Determine overall status
+    # Determine overall status (over the calls actually placed)
     if successful_calls == 0:
         status = "failed"
         message = "Failed to initiate any calls"
-    elif successful_calls == len(req.doctors):
+    elif successful_calls == len(unique_doctors):
         status = "success"
         message = f"Successfully initiated all {successful_calls} calls"
     else:
         status = "partial"
-        message = f"Initiated {successful_calls} out of {len(req.doctors)} calls"
+        message = f"Initiated {successful_calls} out of {len(unique_doctors)} calls"
     
     return AppointmentResponse(
         status=status,
@@ -1,8 +1,11 @@
 """
 API routes for Speech-to-Text functionality.
 """
+import asyncio
 import logging
-import json
+from typing import Optional
+
+import orjson
 from fastapi import APIRouter, HTTPException, Depends, status, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 
@@ -49,8 +52,8 @@ async def stream_microphone_transcription(
                     language_code=request.language_code,
                     single_utterance=request.single_utterance,
                 ):
-                    # Send result as JSON line
-                    yield json.dumps(result) + "\n"
+                    # Send result as JSON line (orjson encodes straight to bytes)
+                    yield orjson.dumps(result) + b"\n"
                     
             except Exception as e:
                 logger.error(f"Microphone streaming error: {str(e)}")
@@ -59,7 +62,7 @@ async def stream_microphone_transcription(
                     'transcript': '',
                     'is_final': True
                 }
-                yield json.dumps(error_result) + "\n"
+                yield orjson.dumps(error_result) + b"\n"
         
         return StreamingResponse(
             generate(),
@@ -79,6 +82,7 @@ async def websocket_stream_transcription(
     websocket: WebSocket,
     language_code: str = "en-US",
     sample_rate: int = 16000,
+    stabilized: bool = False,
 ):
     """
     WebSocket endpoint for real-time audio streaming from browser.
@@ -94,12 +98,15 @@ async def websocket_stream_transcription(
         "is_final": true/false,
         "confidence": 0.95  // only for final results
       }
+    - With stabilized=true, interim messages carry only newly confirmed words:
+      {"delta": "...", "is_final": false}
     - Client sends "close" text message to end the stream
     
     Args:
         websocket: WebSocket connection
         language_code: Language code (e.g., 'en-US', 'zh-CN')
         sample_rate: Audio sample rate in Hz (default: 16000)
+        stabilized: Send confirmed word deltas instead of full interim transcripts
     """
     # Accept WebSocket connection with CORS check
     origin = websocket.headers.get("origin")
@@ -123,136 +130,102 @@ async def websocket_stream_transcription(
     logger.info(f"WebSocket connection accepted - language: {language_code}, sample_rate: {sample_rate}")
     
     service = get_speech_service()
-    audio_buffer = []
     is_running = True
     transcription_started = False
+    transcription_task = None
+    
+    # Audio handed from the message loop to the recognizer; None ends the stream
+    audio_queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+    
+    async def audio_generator():
+        """Async generator that yields audio chunks from the queue."""
+        while True:
+            audio_chunk = await audio_queue.get()
+            if audio_chunk is None:
+                return
+            yield audio_chunk
+    
+    async def transcribe_stream():
+        """Transcribe audio stream and send results back."""
+        try:
+            async for result in service.transcribe_audio_stream_async(
+                audio_generator=audio_generator(),
+                language_code=language_code,
+                sample_rate=sample_rate,
+                single_utterance=False,
+                stabilized=stabilized,
+            ):
+                await websocket.send_text(orjson.dumps(result).decode())
+                if result.is_final:
+                    transcript = result.transcript
+                    logger.info(f"✅ Transcribed: {transcript[:80]}{'...' if len(transcript) > 80 else ''}")
+        except Exception as e:
+            logger.error(f"Transcription error: {str(e)}")
+            logger.error(f"Sending error to client: {str(e)}")
+            try:
+                await websocket.send_json({
+                    'error': str(e),
+                    'transcript': '',
+                    'is_final': True
+                })
+            except Exception:
+                pass
+        finally:
+            logger.info("Transcription done")
     
     try:
-        import asyncio
-        import queue
-        import threading
-        
-        # Use a queue for thread-safe audio buffering
-        audio_queue = queue.Queue()
-        
-        def audio_generator():
-            """Generator that yields audio chunks from the queue."""
-            while is_running or not audio_queue.empty():
-                try:
-                    # Get audio with timeout to allow checking is_running
-                    audio_chunk = audio_queue.get(timeout=0.1)
-                    yield audio_chunk
-                except queue.Empty:
-                    # Yield empty bytes to keep the stream alive
-                    continue
-        
-        # Queue for sending results back to client
-        result_queue = queue.Queue()
-        
-        async def transcribe_stream():
-            """Transcribe audio stream and send results back."""
-            def run_transcription():
-                """Run transcription in a thread since it's synchronous."""
-                try:
-                    for result in service.transcribe_audio_stream(
-                        audio_generator=audio_generator(),
-                        language_code=language_code,
-                        sample_rate=sample_rate,
-                        single_utterance=False,
-                    ):
-                        # Put result in queue for async sending
-                        result_queue.put(('result', result))
-                except Exception as e:
-                    logger.error(f"Transcription error: {str(e)}")
-                    result_queue.put(('error', str(e)))
-                finally:
-                    result_queue.put(('done', None))
-            
-            # Run transcription in a separate thread
-            transcription_thread = threading.Thread(target=run_transcription, daemon=True)
-            transcription_thread.start()
-            return transcription_thread
-        
-        # Don't start transcription yet - wait for first audio chunk
-        transcription_thread = None
-        
         logger.info("Starting WebSocket message loop...")
         message_count = 0
         
-        # Main message loop - process incoming messages and send results
+        # Main message loop - results are sent by the transcription task itself
         while is_running:
+            # Stop once transcription has finished (done or failed)
+            if transcription_task is not None and transcription_task.done():
+                break
+            
             try:
-                # Try to receive message with a small timeout to allow checking result queue
+                # Receive with a small timeout so a finished transcription is noticed
                 try:
                     message = await asyncio.wait_for(websocket.receive(), timeout=0.1)
-                    message_count += 1
-                    
-                    # Log first message and every 100th message
-                    if message_count == 1 or message_count % 100 == 0:
-                        logger.info(f"📨 Processed {message_count} messages")
-                    
-                    # Check message type
-                    msg_type = message.get('type')
-                    
-                    if msg_type == 'websocket.disconnect':
-                        logger.info("Client disconnected")
-                        is_running = False
-                        break
-                    
-                    # Handle text messages
-                    if 'text' in message:
-                        text = message['text']
-                        logger.info(f"Received text message: {text}")
-                        if text == 'close':
-                            logger.info("Client requested to close connection")
-                            is_running = False
-                            break
-                    
-                    # Handle binary messages
-                    elif 'bytes' in message:
-                        audio_data = message['bytes']
-                        
-                        # Start transcription after receiving first audio chunk
-                        if not transcription_started and audio_data:
-                            logger.info(f"✓ Starting transcription (first chunk: {len(audio_data)} bytes)...")
-                            transcription_started = True
-                            transcription_thread = await transcribe_stream()
-                            logger.info("✓ Transcription started successfully")
-                        
-                        # Add audio to queue
-                        audio_queue.put(audio_data)
-                    
                 except asyncio.TimeoutError:
-                    # No message received, that's OK - check for results to send
-                    pass
+                    continue
                 
-                # Check for transcription results to send back to client
-                try:
-                    msg_type, data = result_queue.get_nowait()
-                    
-                    if msg_type == 'result':
-                        await websocket.send_json(data)
-                        if data.get('is_final'):
-                            transcript = data.get('transcript', '')
-                            logger.info(f"✅ Transcribed: {transcript[:80]}{'...' if len(transcript) > 80 else ''}")
-                    elif msg_type == 'error':
-                        logger.error(f"Sending error to client: {data}")
-                        await websocket.send_json({
-                            'error': data,
-                            'transcript': '',
-                            'is_final': True
-                        })
+                message_count += 1
+                
+                # Log first message and every 100th message
+                if message_count == 1 or message_count % 100 == 0:
+                    logger.info(f"📨 Processed {message_count} messages")
+                
+                # Check message type
+                msg_type = message.get('type')
+                
+                if msg_type == 'websocket.disconnect':
+                    logger.info("Client disconnected")
+                    is_running = False
+                    break
+                
+                # Handle text messages
+                if 'text' in message:
+                    text = message['text']
+                    logger.info(f"Received text message: {text}")
+                    if text == 'close':
+                        logger.info("Client requested to close connection")
                         is_running = False
-                    elif msg_type == 'done':
-                        logger.info("Transcription done")
                         break
-                        
-                except queue.Empty:
-                    # No results to send, that's OK
-                    pass
                 
-                # Small delay to prevent tight loop
-                await asyncio.sleep(0.001)
+                # Handle binary messages
+                elif 'bytes' in message:
+                    audio_data = message['bytes']
+                    
+                    # Start transcription after receiving first audio chunk
+                    if not transcription_started and audio_data:
+                        logger.info(f"✓ Starting transcription (first chunk: {len(audio_data)} bytes)...")
+                        transcription_started = True
+                        transcription_task = asyncio.create_task(transcribe_stream())
+                        logger.info("✓ Transcription started successfully")
+                    
+                    # Add audio to queue
+                    audio_queue.put_nowait(audio_data)
                 
             except WebSocketDisconnect:
                 logger.info("WebSocket disconnected by client")
@@ -267,10 +240,6 @@ async def websocket_stream_transcription(
         is_running = False
         logger.info(f"WebSocket session ended - processed {message_count} messages total")
         
-        # Wait for transcription thread to finish (if it was started)
-        if transcription_thread:
-            transcription_thread.join(timeout=5.0)
-        
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
         is_running = False
@@ -286,6 +255,14 @@ async def websocket_stream_transcription(
         except:
             pass
     finally:
+        # End the audio stream and stop the recognizer (if it was started)
+        audio_queue.put_nowait(None)
+        if transcription_task is not None and not transcription_task.done():
+            transcription_task.cancel()
+            try:
+                await transcription_task
+            except asyncio.CancelledError:
+                pass
         try:
             await websocket.close()
         except:
@@ -307,7 +284,7 @@ async def health_check(service: SpeechToTextService = Depends(get_speech_service
     try:
         health = service.check_health()
         # Return in the format expected by HealthCheckResponse
-        return HealthCheckResponse(
+        return HealthCheckResponse.model_construct(
             status=health['status'],
             service=health['service'],
             model=health['language']  # Use language as model field
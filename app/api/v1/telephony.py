@@ -92,16 +92,21 @@ class InstructionStore:
 
 instruction_store = InstructionStore(ttl_seconds=600)
 
+# Configured public base URL, resolved once: an explicit PUBLIC_BASE_URL wins,
+# then NGROK_URL (local development); None means infer it per request
+_PUBLIC_BASE_URL = (settings.PUBLIC_BASE_URL or settings.NGROK_URL or "").rstrip("/") or None
+
+
 def get_public_url(request: Request) -> str:
     """
     Get the public URL for this server.
-    Uses X-Forwarded-Host header if available (for ngrok/Cloud Run).
+    Uses PUBLIC_BASE_URL, then NGROK_URL, if configured; otherwise uses the
+    X-Forwarded-Host header if available (for ngrok/Cloud Run), then Host.
+    Shared by the telephony endpoints and appointment booking so every
+    callback for a deployment points at the same host.
     """
-    # Check for environment variable override (for ngrok development)
-    ngrok_url = getattr(settings, 'NGROK_URL', None)
-    if ngrok_url:
-        logger.info(f"get_public_url - Using NGROK_URL from settings: {ngrok_url}")
-        return ngrok_url
+    if _PUBLIC_BASE_URL:
+        return _PUBLIC_BASE_URL
     
     # Check for forwarded host (ngrok, Cloud Run, etc.)
     forwarded_host = request.headers.get("x-forwarded-host")
@@ -196,6 +201,50 @@ def generate_twiml(websocket_url: str, parameters: Dict[str, str] | None = None)
 </Response>"""
 
 
+async def place_call(call_request: CallRequest, public_url: str) -> CallResponse:
+    """
+    Place an outbound call whose TwiML is served from public_url.
+    
+    Shared by the /call endpoint and in-process callers (appointment booking),
+    which use it directly instead of going through HTTP. Twilio must already be
+    configured; errors from the Twilio client are raised to the caller.
+    """
+    # Build TwiML URL (with optional voice, system instruction, and initial message as query params)
+    twiml_url = call_request.twiml_url
+    if not twiml_url:
+        twiml_url = f"{public_url}/api/v1/telephony/twiml"
+        # Add query parameters
+        params = []
+        from urllib.parse import quote
+        if call_request.voice:
+            params.append(f"voice={quote(call_request.voice)}")
+        # For long instructions, avoid putting raw text in URL; store and pass token
+        token: str | None = None
+        if call_request.system_instruction:
+            token = uuid4().hex
+            instruction_store.set(token, call_request.system_instruction)
+            params.append(f"token={quote(token)}")
+        if params:
+            twiml_url += "?" + "&".join(params)
+        logger.info(f"Telephony /call API - Generated TwiML URL: {twiml_url}")
+    
+    # Initiate the call; the Twilio REST client blocks, so it runs off the loop
+    result = await asyncio.to_thread(
+        get_twilio_service().initiate_call,
+        to_number=call_request.to,
+        twiml_url=twiml_url,
+        from_number=call_request.from_number,
+    )
+    
+    logger.info(f"Call initiated successfully: {result['sid']}")
+    
+    return CallResponse(
+        success=True,
+        call_sid=result["sid"],
+        message=f"Call initiated to {call_request.to}"
+    )
+
+
 # ============================================
 # API Endpoints
 # ============================================
@@ -240,39 +289,7 @@ async def initiate_call(request: Request):
         logger.info(f"Telephony /call API - Public URL: {public_url}")
         logger.info(f"Telephony /call API - Request headers: {dict(request.headers)}")
         
-        # Build TwiML URL (with optional voice, system instruction, and initial message as query params)
-        twiml_url = call_request.twiml_url
-        if not twiml_url:
-            twiml_url = f"{public_url}/api/v1/telephony/twiml"
-            # Add query parameters
-            params = []
-            from urllib.parse import quote
-            if call_request.voice:
-                params.append(f"voice={quote(call_request.voice)}")
-            # For long instructions, avoid putting raw text in URL; store and pass token
-            token: str | None = None
-            if call_request.system_instruction:
-                token = uuid4().hex
-                instruction_store.set(token, call_request.system_instruction)
-                params.append(f"token={quote(token)}")
-            if params:
-                twiml_url += "?" + "&".join(params)
-            logger.info(f"Telephony /call API - Generated TwiML URL: {twiml_url}")
-        
-        # Initiate the call
-        result = twilio_service.initiate_call(
-            to_number=call_request.to,
-            twiml_url=twiml_url,
-            from_number=call_request.from_number,
-        )
-        
-        logger.info(f"Call initiated successfully: {result['sid']}")
-        
-        return CallResponse(
-            success=True,
-            call_sid=result["sid"],
-            message=f"Call initiated to {call_request.to}"
-        )
+        return await place_call(call_request, public_url)
         
     except HTTPException:
         raise
@@ -7,6 +7,7 @@ class Settings(BaseSettings):
     PORT: int = 8080
     ENVIRONMENT: str = "dev"
     CORS_ORIGINS: List[AnyHttpUrl] | List[str] = ["http://localhost:3000"]
+    CORS_ENABLED: bool = True  # Disable when the API is not called from browsers
     APP_BASE_URL: str | None = None  # Base URL for the application (used in callbacks)
 
     # BigQuery & GCP Settings
@@ -37,6 +38,9 @@ class Settings(BaseSettings):
     INDEXER_BATCH_SIZE: int = 100
     INDEXER_MAX_CONCURRENCY: int = 10
 
+    # Threads for blocking calls offloaded from the event loop (run_in_executor / to_thread)
+    THREADPOOL_MAX_WORKERS: int = 32
+
     # Vector Search
     VECTOR_SEARCH_ENDPOINT_NAME: str | None = None
     VECTOR_SEARCH_DEPLOYED_INDEX_ID: str = 'doc_all_embedding_deployed'
@@ -68,6 +72,21 @@ class Settings(BaseSettings):
     # Single utterance mode (stop after detecting end of speech)
     SPEECH_SINGLE_UTTERANCE: bool = False
 
+    # Minimum audio payload per streaming request (3200 = 100 ms of 16 kHz LINEAR16)
+    # Smaller incoming chunks are coalesced; 0 sends every chunk as-is
+    SPEECH_FRAME_BYTES: int = 3200
+
+    # Silence gate for microphone capture: chunks quieter than the threshold are
+    # dropped once silence has lasted SPEECH_VAD_SILENCE_SECONDS (which also ends
+    # a single-utterance stream)
+    SPEECH_VAD_ENABLED: bool = False
+    SPEECH_VAD_THRESHOLD_DB: float = -40.0
+    SPEECH_VAD_SILENCE_SECONDS: float = 1.5
+
+    # Create the Speech client and open its gRPC connection at startup, so the
+    # first request does not pay for the TLS handshake
+    SPEECH_WARMUP: bool = True
+
     # ============================================
     # Twilio Configuration
     # ============================================
@@ -81,6 +100,10 @@ class Settings(BaseSettings):
     # ngrok URL for local development (override for WebSocket connections)
     NGROK_URL: str | None = None
 
+    # Public base URL for Twilio callbacks (TwiML, media stream). Unset by
+    # default: the URL is then taken from NGROK_URL or the request headers
+    PUBLIC_BASE_URL: str | None = None
+
     # ============================================
     # Vertex AI Live API Configuration
     # ============================================
@@ -1,38 +1,96 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from .api.v1 import api_router
 from .config import settings
+from .services.speech_service import get_speech_service
 from .util.logging import setup_logging
 
 log = setup_logging()
 
+# Root/health bodies depend only on settings, so they are encoded once here
+# instead of building and serializing a dict on every liveness probe
+ROOT_BODY = orjson.dumps({
+    "service": "SmarterDoc Backend API",
+    "version": "0.1.0",
+    "status": "running",
+    "docs": "/docs",
+    "environment": settings.ENVIRONMENT
+})
+HEALTHZ_BODY = orjson.dumps({"ok": True, "env": settings.ENVIRONMENT})
+HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "SmarterDoc Backend",
+    "environment": settings.ENVIRONMENT
+})
+
+
+async def _warm_up_speech() -> None:
+    """Create the speech service and open its gRPC connections."""
+    try:
+        # Creating the service loads credentials, which may block
+        service = await asyncio.to_thread(get_speech_service)
+        await service.warm_up()
+        log.info("Speech-to-Text clients warmed up")
+    except Exception as e:
+        # Not fatal: the first request will create/connect the client instead
+        log.warning(f"Speech-to-Text warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup logging and warm-up; the executor is shut down on shutdown."""
+    port = int(os.environ.get("PORT", 8080))
+    log.info(f"Starting SmarterDoc Backend on port {port}")
+    log.info(f"Environment: {settings.ENVIRONMENT}")
+    # Blocking SDK calls (BigQuery, Vector Search, speech warm-up) run on the
+    # loop's default executor, which the stdlib sizes at cpu_count + 4 threads;
+    # on a 1-2 vCPU instance that caps concurrent requests at 5-6
+    executor = ThreadPoolExecutor(
+        max_workers=settings.THREADPOOL_MAX_WORKERS,
+        thread_name_prefix="blocking-io",
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+    # Warm in the background so startup (and health checks) are not delayed
+    warmup_task = (
+        asyncio.create_task(_warm_up_speech())
+        if settings.SPEECH_WARMUP else None
+    )
+    log.info("Application startup complete")
+    log.info(f"CORS {'configured for frontend domains' if settings.CORS_ENABLED else 'disabled'}")
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    executor.shutdown(wait=False)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="SmarterDoc Backend", 
     version="0.1.0",
-    description="SmarterDoc Backend API with AI Chat and Speech-to-Text capabilities"
+    description="SmarterDoc Backend API with AI Chat and Speech-to-Text capabilities",
+    default_response_class=ORJSONResponse,  # orjson encodes every JSON response in C
+    lifespan=lifespan,
 )
 
 # Configure CORS FIRST - before any routes
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Add startup logging
-@app.on_event("startup")
-async def startup_event():
-    port = int(os.environ.get("PORT", 8080))
-    log.info(f"Starting SmarterDoc Backend on port {port}")
-    log.info(f"Environment: {settings.ENVIRONMENT}")
-    log.info("Application startup complete")
-    log.info("CORS configured for frontend domains")
+# The middleware runs on every request, so deployments with no browser
+# clients (e.g. server-to-server only) can switch it off via CORS_ENABLED
+if settings.CORS_ENABLED:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Include API routers
 app.include_router(api_router, prefix="/api")
@@ -48,27 +106,17 @@ if static_dir.exists():
 @app.get("/")
 async def root():
     """Root endpoint with service information."""
-    return {
-        "service": "SmarterDoc Backend API",
-        "version": "0.1.0",
-        "status": "running",
-        "docs": "/docs",
-        "environment": settings.ENVIRONMENT
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 @app.get("/healthz")
 def health():
     """Health check endpoint."""
-    return {"ok": True, "env": settings.ENVIRONMENT}
+    return Response(content=HEALTHZ_BODY, media_type="application/json")
 
 @app.get("/health")
 def health_check():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "service": "SmarterDoc Backend",
-        "environment": settings.ENVIRONMENT
-    }
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 @app.get("/hello")
 def hello_world():
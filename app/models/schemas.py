@@ -133,7 +133,7 @@ class AppointmentCallResult(BaseModel):
     """Result of a single call attempt."""
     doctor_name: str
     doctor_specialty: str
-    call_status: str  # "success", "failed", "pending"
+    call_status: str  # "success", "failed", "pending", "duplicate"
     call_sid: Optional[str] = None
     message: str
 
@@ -2,6 +2,7 @@
 Google Gen AI client service for chat functionality.
 """
 import logging
+from functools import lru_cache
 from typing import Optional, List, Dict, Any, AsyncIterator
 from google import genai
 from google.genai import types
@@ -11,6 +12,30 @@ from app.models.schemas import ChatMessage
 
 logger = logging.getLogger(__name__)
 
+# Generation defaults are fixed for the life of the process, so they are
+# resolved once here instead of through getattr(settings, ...) per request
+_DEFAULT_TEMPERATURE = getattr(settings, 'GENAI_TEMPERATURE', 0.7)
+_DEFAULT_TOP_P = getattr(settings, 'GENAI_TOP_P', 0.95)
+_DEFAULT_TOP_K = getattr(settings, 'GENAI_TOP_K', 40)
+_DEFAULT_MAX_OUTPUT_TOKENS = getattr(settings, 'GENAI_MAX_OUTPUT_TOKENS', 8192)
+
+
+@lru_cache(maxsize=64)
+def _generation_config(temperature: float, max_tokens: int) -> types.GenerateContentConfig:
+    """
+    Build (and memoize) a generation config.
+    
+    Most requests use the defaults or one of a few overrides, so the
+    validated config object is shared instead of rebuilt per request.
+    The SDK only reads the config, which makes sharing it safe.
+    """
+    return types.GenerateContentConfig(
+        temperature=temperature,
+        top_p=_DEFAULT_TOP_P,
+        top_k=_DEFAULT_TOP_K,
+        max_output_tokens=max_tokens,
+    )
+
 
 class GenAIChatService:
     """Service for interacting with Google Gen AI."""
@@ -50,7 +75,8 @@ class GenAIChatService:
     def _build_contents(
         self, 
         message: str, 
-        history: Optional[List[ChatMessage]] = None
+        history: Optional[List[ChatMessage]] = None,
+        system_instruction: Optional[str] = None,
     ) -> List[types.Content]:
         """
         Build contents list from message and history.
@@ -58,6 +84,8 @@ class GenAIChatService:
         Args:
             message: Current user message
             history: Previous conversation history
+            system_instruction: Prepended to the first user turn (the first
+                history message, or the current message if there is no history)
             
         Returns:
             List of Content objects
@@ -66,12 +94,19 @@ class GenAIChatService:
         
         # Add history if provided
         if history:
-            for msg in history:
+            for i, msg in enumerate(history):
+                role, text = msg.role, msg.content
+                if i == 0 and system_instruction:
+                    # Add system instruction as first message
+                    role, text = 'user', f"System: {system_instruction}\n\nUser: {text}"
                 content = types.Content(
-                    role=msg.role,
-                    parts=[types.Part.from_text(text=msg.content)]
+                    role=role,
+                    parts=[types.Part.from_text(text=text)]
                 )
                 contents.append(content)
+        elif system_instruction:
+            # Add system instruction to current message
+            message = f"System: {system_instruction}\n\nUser: {message}"
         
         # Add current message
         user_content = types.Content(
@@ -88,11 +123,9 @@ class GenAIChatService:
         max_tokens: Optional[int] = None,
     ) -> types.GenerateContentConfig:
         """Build generation config."""
-        return types.GenerateContentConfig(
-            temperature=temperature or getattr(settings, 'GENAI_TEMPERATURE', 0.7),
-            top_p=getattr(settings, 'GENAI_TOP_P', 0.95),
-            top_k=getattr(settings, 'GENAI_TOP_K', 40),
-            max_output_tokens=max_tokens or getattr(settings, 'GENAI_MAX_OUTPUT_TOKENS', 8192),
+        return _generation_config(
+            temperature or _DEFAULT_TEMPERATURE,
+            max_tokens or _DEFAULT_MAX_OUTPUT_TOKENS,
         )
     
     async def generate_response(
@@ -122,20 +155,7 @@ class GenAIChatService:
             model_name = model or settings.GEMINI_MODEL
             
             # Build contents - include system instruction in the message if provided
-            if system_instruction:
-                # Prepend system instruction to the first user message
-                if history:
-                    # Add system instruction as first message
-                    modified_history = [
-                        ChatMessage(role="user", content=f"System: {system_instruction}\n\nUser: {history[0].content}")
-                    ] + history[1:]
-                    contents = self._build_contents(message, modified_history)
-                else:
-                    # Add system instruction to current message
-                    enhanced_message = f"System: {system_instruction}\n\nUser: {message}"
-                    contents = self._build_contents(enhanced_message, None)
-            else:
-                contents = self._build_contents(message, history)
+            contents = self._build_contents(message, history, system_instruction)
             
             config = self._build_generation_config(temperature, max_tokens)
             
@@ -199,20 +219,7 @@ class GenAIChatService:
             model_name = model or settings.GEMINI_MODEL
             
             # Build contents - include system instruction in the message if provided
-            if system_instruction:
-                # Prepend system instruction to the first user message
-                if history:
-                    # Add system instruction as first message
-                    modified_history = [
-                        ChatMessage(role="user", content=f"System: {system_instruction}\n\nUser: {history[0].content}")
-                    ] + history[1:]
-                    contents = self._build_contents(message, modified_history)
-                else:
-                    # Add system instruction to current message
-                    enhanced_message = f"System: {system_instruction}\n\nUser: {message}"
-                    contents = self._build_contents(enhanced_message, None)
-            else:
-                contents = self._build_contents(message, history)
+            contents = self._build_contents(message, history, system_instruction)
             
             config = self._build_generation_config(temperature)
             
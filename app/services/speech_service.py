@@ -3,15 +3,204 @@ Google Cloud Speech-to-Text service for audio transcription.
 
 Reference: https://cloud.google.com/speech-to-text/docs/transcribe-streaming-audio
 """
+import asyncio
 import logging
-from typing import AsyncIterator, Optional, Generator
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Generator, Union
+import grpc
+import numpy as np
 from google.cloud import speech
-# NOTE: pyaudio is only imported when needed (lazy import) to avoid Cloud Run issues
+from google.cloud.speech_v1.services.speech.transports import (
+    SpeechGrpcAsyncIOTransport,
+    SpeechGrpcTransport,
+)
+# NOTE: sounddevice is only imported when needed (lazy import) to avoid Cloud Run issues
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Speech settings (resolved once at import instead of on every call)
+_DEFAULT_SAMPLE_RATE = getattr(settings, 'SPEECH_SAMPLE_RATE', 16000)
+_DEFAULT_LANGUAGE_CODE = getattr(settings, 'SPEECH_LANGUAGE_CODE', 'en-US')
+_DEFAULT_AUTOMATIC_PUNCTUATION = getattr(settings, 'SPEECH_ENABLE_AUTOMATIC_PUNCTUATION', True)
+_DEFAULT_SINGLE_UTTERANCE = getattr(settings, 'SPEECH_SINGLE_UTTERANCE', False)
+_SPEECH_MODEL = getattr(settings, 'SPEECH_MODEL', 'default')
+_FRAME_BYTES = getattr(settings, 'SPEECH_FRAME_BYTES', 3200)
+_VAD_ENABLED = getattr(settings, 'SPEECH_VAD_ENABLED', False)
+_VAD_THRESHOLD_DB = getattr(settings, 'SPEECH_VAD_THRESHOLD_DB', -40.0)
+_VAD_SILENCE_SECONDS = getattr(settings, 'SPEECH_VAD_SILENCE_SECONDS', 1.5)
+
+# A streaming_recognize call is cut off by the service after ~305 seconds,
+# so long streams are reopened shortly before that
+_STREAM_LIMIT_SECONDS = 290
+# Most unfinalized audio carried over into the reopened stream
+_STREAM_REPLAY_SECONDS = 5
+# Keepalive pings keep the HTTP/2 connection (and its TLS session) open
+# between requests instead of paying a fresh handshake after idle periods
+_GRPC_CHANNEL_OPTIONS = (
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+)
+# While the silence gate drops audio, still send one chunk this often
+_VAD_KEEPALIVE_SECONDS = 5
+
+
+@lru_cache(maxsize=1)
+def _speech_channel():
+    """
+    Shared gRPC channel for synchronous Speech-to-Text clients.
+    
+    Authenticates with Application Default Credentials, like SpeechClient()
+    does on its own.
+    """
+    return SpeechGrpcTransport.create_channel(options=_GRPC_CHANNEL_OPTIONS)
+
+
+def _join_audio(chunks: List[bytes]) -> bytes:
+    """
+    Concatenate coalesced audio chunks into one request payload.
+    
+    A lone chunk is passed through without copying; several are joined in a
+    single copy (rather than growing a bytearray and copying it out again).
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    return b''.join(chunks)
+
+
+def _level_db(chunk: bytes) -> float:
+    """RMS level of a LINEAR16 chunk in dBFS (-inf for digital silence)."""
+    samples = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2).astype(np.float32)
+    if not samples.size:
+        return float('-inf')
+    rms = float(np.sqrt(np.mean(samples * samples)))
+    return 20 * math.log10(rms / 32768) if rms > 0 else float('-inf')
+
+
+@lru_cache(maxsize=32)
+def _recognition_config(
+    language_code: str,
+    sample_rate: int,
+    enable_automatic_punctuation: bool,
+) -> speech.RecognitionConfig:
+    """
+    Build (and memoize) a recognition config.
+    
+    Requests almost always use the defaults or one of a few languages and
+    sample rates, so the protobuf is built once per combination. The client
+    only serializes it, which makes sharing it safe.
+    """
+    return speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=sample_rate,
+        language_code=language_code,
+        enable_automatic_punctuation=enable_automatic_punctuation,
+        model=_SPEECH_MODEL,
+    )
+
+
+@lru_cache(maxsize=32)
+def _streaming_config(
+    language_code: str,
+    sample_rate: int,
+    enable_automatic_punctuation: bool,
+    single_utterance: bool,
+) -> speech.StreamingRecognitionConfig:
+    """Build (and memoize) a streaming config around the cached recognition config."""
+    return speech.StreamingRecognitionConfig(
+        config=_recognition_config(language_code, sample_rate, enable_automatic_punctuation),
+        interim_results=True,  # Get interim results for better responsiveness
+        single_utterance=single_utterance,
+    )
+
+
+@lru_cache(maxsize=32)
+def _streaming_config_request(
+    language_code: str,
+    sample_rate: int,
+    enable_automatic_punctuation: bool,
+    single_utterance: bool,
+) -> speech.StreamingRecognizeRequest:
+    """Build (and memoize) the config-only request that opens an async stream."""
+    return speech.StreamingRecognizeRequest(
+        streaming_config=_streaming_config(
+            language_code, sample_rate, enable_automatic_punctuation, single_utterance,
+        )
+    )
+
+
+@dataclass(slots=True)
+class FinalTranscript:
+    """A final streaming result."""
+    transcript: str
+    is_final: bool
+    confidence: float
+
+
+@dataclass(slots=True)
+class InterimTranscript:
+    """An interim streaming result; may still change."""
+    transcript: str
+    is_final: bool
+    stability: float
+
+
+@dataclass(slots=True)
+class TranscriptDelta:
+    """Words newly confirmed by _LocalAgreement since the previous delta."""
+    delta: str
+    is_final: bool
+
+
+# Streaming results serialize straight to JSON with orjson (dataclass support)
+# and keep the field names of the dicts they replace
+TranscriptionResult = Union[FinalTranscript, InterimTranscript, TranscriptDelta]
+
+
+class _LocalAgreement:
+    """
+    LocalAgreement-2 over interim transcripts.
+    
+    A word is confirmed once two consecutive interim hypotheses agree on it
+    (and on every word before it). Interim results are reduced to the words
+    confirmed since the last one, so consumers do work proportional to new
+    words rather than re-processing the whole transcript each update.
+    Final results pass through unchanged and reset the state.
+    """
+    
+    def __init__(self):
+        self.previous: List[str] = []
+        self.confirmed = 0
+    
+    def update(self, result: TranscriptionResult) -> Optional[TranscriptionResult]:
+        """Return the result to emit, or None if nothing new was confirmed."""
+        if result.is_final:
+            self.previous = []
+            self.confirmed = 0
+            return result
+        
+        words = result.transcript.split()
+        agreed = 0
+        for previous_word, word in zip(self.previous, words):
+            if previous_word != word:
+                break
+            agreed += 1
+        self.previous = words
+        
+        if agreed <= self.confirmed:
+            return None
+        delta = ' '.join(words[self.confirmed:agreed])
+        self.confirmed = agreed
+        return TranscriptDelta(delta, False)
+
 
 class SpeechToTextService:
     """Service for converting speech to text using Google Cloud Speech-to-Text."""
@@ -19,9 +208,12 @@ class SpeechToTextService:
     def __init__(self):
         """Initialize the Speech-to-Text client."""
         self.client = self._create_client()
+        # grpc.aio channels bind to the running event loop, so the async client
+        # is created on first use from a coroutine rather than here
+        self._async_client: Optional[speech.SpeechAsyncClient] = None
         logger.info(
-            f"Initialized Speech-to-Text client - project: {settings.GCP_PROJECT_ID}, "
-            f"language: {getattr(settings, 'SPEECH_LANGUAGE_CODE', 'en-US')}"
+            "Initialized Speech-to-Text client - project: %s, language: %s",
+            settings.GCP_PROJECT_ID, _DEFAULT_LANGUAGE_CODE,
         )
     
     def _create_client(self) -> speech.SpeechClient:
@@ -35,13 +227,54 @@ class SpeechToTextService:
         Reference: https://cloud.google.com/speech-to-text/docs/transcribe-streaming-audio
         """
         try:
-            client = speech.SpeechClient()
+            client = speech.SpeechClient(transport=SpeechGrpcTransport(channel=_speech_channel()))
             logger.info("Created Speech-to-Text client successfully")
             return client
         except Exception as e:
-            logger.error(f"Failed to create Speech-to-Text client: {str(e)}")
+            logger.error("Failed to create Speech-to-Text client: %s", e)
             raise
     
+    def _get_async_client(self) -> speech.SpeechAsyncClient:
+        """Return the async Speech-to-Text client, creating it on first use."""
+        if self._async_client is None:
+            try:
+                channel = SpeechGrpcAsyncIOTransport.create_channel(options=_GRPC_CHANNEL_OPTIONS)
+                self._async_client = speech.SpeechAsyncClient(
+                    transport=SpeechGrpcAsyncIOTransport(channel=channel)
+                )
+                logger.info("Created Speech-to-Text async client successfully")
+            except Exception as e:
+                logger.error("Failed to create Speech-to-Text async client: %s", e)
+                raise
+        return self._async_client
+    
+    def _build_recognition_config(
+        self,
+        language_code: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        enable_automatic_punctuation: Optional[bool] = None,
+    ) -> speech.RecognitionConfig:
+        """
+        Build recognition configuration, filling unset values from settings.
+        
+        Args:
+            language_code: Language code (e.g., 'en-US', 'zh-CN')
+            sample_rate: Audio sample rate in Hz
+            enable_automatic_punctuation: Enable automatic punctuation
+            
+        Returns:
+            RecognitionConfig object
+        """
+        return _recognition_config(
+            language_code or _DEFAULT_LANGUAGE_CODE,
+            sample_rate or _DEFAULT_SAMPLE_RATE,
+            (
+                enable_automatic_punctuation 
+                if enable_automatic_punctuation is not None 
+                else _DEFAULT_AUTOMATIC_PUNCTUATION
+            ),
+        )
+    
     def _build_streaming_config(
         self,
         language_code: Optional[str] = None,
@@ -61,31 +294,28 @@ class SpeechToTextService:
         Returns:
             StreamingRecognitionConfig object
         """
-        # Build recognition config
-        recognition_config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=sample_rate or getattr(settings, 'SPEECH_SAMPLE_RATE', 16000),
-            language_code=language_code or getattr(settings, 'SPEECH_LANGUAGE_CODE', 'en-US'),
-            enable_automatic_punctuation=(
+        return _streaming_config(*self._streaming_config_key(
+            language_code, sample_rate, single_utterance, enable_automatic_punctuation,
+        ))
+    
+    @staticmethod
+    def _streaming_config_key(
+        language_code: Optional[str],
+        sample_rate: Optional[int],
+        single_utterance: Optional[bool],
+        enable_automatic_punctuation: Optional[bool],
+    ) -> tuple:
+        """Fill unset streaming options from settings, in the cached builders' argument order."""
+        return (
+            language_code or _DEFAULT_LANGUAGE_CODE,
+            sample_rate or _DEFAULT_SAMPLE_RATE,
+            (
                 enable_automatic_punctuation 
                 if enable_automatic_punctuation is not None 
-                else getattr(settings, 'SPEECH_ENABLE_AUTOMATIC_PUNCTUATION', True)
-            ),
-            model=getattr(settings, 'SPEECH_MODEL', 'default'),
-        )
-        
-        # Build streaming config
-        streaming_config = speech.StreamingRecognitionConfig(
-            config=recognition_config,
-            interim_results=True,  # Get interim results for better responsiveness
-            single_utterance=(
-                single_utterance 
-                if single_utterance is not None 
-                else getattr(settings, 'SPEECH_SINGLE_UTTERANCE', False)
+                else _DEFAULT_AUTOMATIC_PUNCTUATION
             ),
+            single_utterance if single_utterance is not None else _DEFAULT_SINGLE_UTTERANCE,
         )
-        
-        return streaming_config
     
     def transcribe_audio_stream(
         self,
@@ -94,7 +324,8 @@ class SpeechToTextService:
         sample_rate: Optional[int] = None,
         single_utterance: Optional[bool] = None,
         enable_automatic_punctuation: Optional[bool] = None,
-    ) -> Generator[dict, None, None]:
+        stabilized: bool = False,
+    ) -> Generator[TranscriptionResult, None, None]:
         """
         Transcribe streaming audio in real-time.
         
@@ -104,15 +335,14 @@ class SpeechToTextService:
             sample_rate: Audio sample rate in Hz
             single_utterance: If True, stop after single utterance
             enable_automatic_punctuation: Enable automatic punctuation
+            stabilized: If True, interim results only carry newly confirmed
+                words (see _LocalAgreement) instead of the full transcript
             
         Yields:
-            Dictionary containing transcription results:
-            {
-                'transcript': str,
-                'is_final': bool,
-                'confidence': float (only for final results),
-                'stability': float (only for interim results)
-            }
+            FinalTranscript (transcript, is_final, confidence) for final results
+            and InterimTranscript (transcript, is_final, stability) otherwise.
+            With stabilized=True, interim results are instead TranscriptDelta
+            (delta, is_final).
         """
         try:
             # Build streaming config
@@ -123,12 +353,31 @@ class SpeechToTextService:
                 enable_automatic_punctuation=enable_automatic_punctuation,
             )
             
+            # Coalesce small chunks so each request carries at least this much audio
+            frame_bytes = _FRAME_BYTES
+            
             # Create audio stream requests
             def audio_request_generator():
                 """Generator that yields StreamingRecognizeRequest objects with audio."""
+                # gRPC serializes each request before pulling the next one, so a
+                # single message is reused with only its audio replaced
+                request = speech.StreamingRecognizeRequest()
+                pending: List[bytes] = []
+                pending_bytes = 0
                 for audio_chunk in audio_generator:
-                    if audio_chunk:  # Only send non-empty chunks
-                        yield speech.StreamingRecognizeRequest(audio_content=audio_chunk)
+                    if not audio_chunk:  # Only send non-empty chunks
+                        continue
+                    pending.append(audio_chunk)
+                    pending_bytes += len(audio_chunk)
+                    if pending_bytes >= frame_bytes:
+                        request.audio_content = _join_audio(pending)
+                        yield request
+                        pending.clear()
+                        pending_bytes = 0
+                # Flush the tail once the audio source is exhausted
+                if pending:
+                    request.audio_content = _join_audio(pending)
+                    yield request
             
             # Perform streaming recognition
             # Pass config and audio requests separately for compatibility
@@ -142,56 +391,210 @@ class SpeechToTextService:
                 
                 # Process responses
                 response_count = 0
+                agreement = _LocalAgreement() if stabilized else None
                 for response in responses:
                     response_count += 1
+                    transcription = self._stream_result(response, response_count)
+                    if transcription is not None and agreement is not None:
+                        transcription = agreement.update(transcription)
+                    if transcription is not None:
+                        yield transcription
                     
-                    if not response.results:
-                        logger.debug(f"Response #{response_count}: no results")
-                        continue
-                    
-                    # The results list is consecutive
-                    result = response.results[0]
-                    
-                    if not result.alternatives:
-                        logger.debug(f"Response #{response_count}: no alternatives")
-                        continue
-                    
-                    # Get the top alternative
-                    alternative = result.alternatives[0]
-                    
-                    result_dict = {
-                        'transcript': alternative.transcript,
-                        'is_final': result.is_final,
-                    }
-                    
-                    # Add confidence for final results
-                    if result.is_final:
-                        result_dict['confidence'] = alternative.confidence
-                        logger.info(f"Got final result: {alternative.transcript}")
-                    else:
-                        # Add stability for interim results
-                        result_dict['stability'] = result.stability
-                        logger.debug(f"Got interim result: {alternative.transcript}")
-                    
-                    yield result_dict
-                    
-                logger.info(f"Processed {response_count} responses from Google Speech API")
+                logger.info("Processed %d responses from Google Speech API", response_count)
                 
             except Exception as api_error:
-                logger.error(f"Google Speech API error: {str(api_error)}", exc_info=True)
+                logger.error("Google Speech API error: %s", api_error, exc_info=True)
                 raise
                 
         except Exception as e:
-            logger.error(f"Error in streaming transcription: {str(e)}")
+            logger.error("Error in streaming transcription: %s", e)
+            raise
+    
+    async def transcribe_audio_stream_async(
+        self,
+        audio_generator: AsyncIterator[bytes],
+        language_code: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        single_utterance: Optional[bool] = None,
+        enable_automatic_punctuation: Optional[bool] = None,
+        stabilized: bool = False,
+    ) -> AsyncIterator[TranscriptionResult]:
+        """
+        Transcribe streaming audio in real-time on the async client.
+        
+        Same arguments and results as transcribe_audio_stream, but audio is
+        read from an async iterator and responses are awaited on the event
+        loop, so callers do not need a thread per stream.
+        """
+        try:
+            # Build streaming config
+            config_key = self._streaming_config_key(
+                language_code, sample_rate, single_utterance, enable_automatic_punctuation,
+            )
+            streaming_config = _streaming_config(*config_key)
+            # The async client takes the config as the first request; it is the
+            # same for every stream with these options, so it is built once
+            config_request = _streaming_config_request(*config_key)
+            
+            # Coalesce small chunks so each request carries at least this much audio
+            frame_bytes = _FRAME_BYTES
+            # 16-bit mono samples
+            bytes_per_second = streaming_config.config.sample_rate_hertz * 2
+            replay_limit = int(bytes_per_second * _STREAM_REPLAY_SECONDS)
+            
+            audio_iter = audio_generator.__aiter__()
+            # Audio sent on the current stream that has not been finalized yet,
+            # as (offset within the stream, payload); replayed after a reconnect
+            pending_audio: deque = deque()
+            state = {'restart': False}
+            
+            async def audio_request_generator(replay: List[bytes]):
+                """Async generator that yields the config request, then audio requests."""
+                yield config_request
+                
+                offset = 0
+                # Each request is serialized before the next one is pulled, so a
+                # single message is reused with only its audio replaced
+                request = speech.StreamingRecognizeRequest()
+                
+                def track(payload: bytes) -> speech.StreamingRecognizeRequest:
+                    nonlocal offset
+                    pending_audio.append((offset, payload))
+                    offset += len(payload)
+                    # Keep only the most recent audio for replay
+                    while len(pending_audio) > 1 and offset - pending_audio[0][0] > replay_limit:
+                        pending_audio.popleft()
+                    request.audio_content = payload
+                    return request
+                
+                for payload in replay:
+                    yield track(payload)
+                
+                started = time.monotonic()
+                pending: List[bytes] = []
+                pending_bytes = 0
+                while True:
+                    # Close this stream before the service's duration limit; the
+                    # caller reopens it and replays the unfinalized audio
+                    if time.monotonic() - started > _STREAM_LIMIT_SECONDS:
+                        state['restart'] = True
+                        break
+                    try:
+                        audio_chunk = await audio_iter.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    if not audio_chunk:  # Only send non-empty chunks
+                        continue
+                    pending.append(audio_chunk)
+                    pending_bytes += len(audio_chunk)
+                    if pending_bytes >= frame_bytes:
+                        yield track(_join_audio(pending))
+                        pending.clear()
+                        pending_bytes = 0
+                # Flush the tail before closing the stream
+                if pending:
+                    yield track(_join_audio(pending))
+            
+            client = self._get_async_client()
+            response_count = 0
+            stream_count = 0
+            agreement = _LocalAgreement() if stabilized else None
+            
+            while True:
+                stream_count += 1
+                state['restart'] = False
+                replay = [payload for _, payload in pending_audio]
+                pending_audio.clear()
+                
+                logger.info("Calling Google Speech API streaming_recognize (async, stream #%d)...", stream_count)
+                try:
+                    responses = await client.streaming_recognize(
+                        requests=audio_request_generator(replay)
+                    )
+                    logger.info("Google Speech API call successful, processing responses...")
+                    
+                    # Process responses
+                    async for response in responses:
+                        response_count += 1
+                        transcription = self._stream_result(response, response_count)
+                        if transcription is None:
+                            continue
+                        if transcription.is_final:
+                            # Audio up to the end of a final result is never replayed,
+                            # so a reconnect cannot repeat confirmed text
+                            end_offset = (
+                                response.results[0].result_end_time.total_seconds() * bytes_per_second
+                            )
+                            while pending_audio and pending_audio[0][0] + len(pending_audio[0][1]) <= end_offset:
+                                pending_audio.popleft()
+                        if agreement is not None:
+                            transcription = agreement.update(transcription)
+                            if transcription is None:
+                                continue
+                        yield transcription
+                    
+                except Exception as api_error:
+                    logger.error("Google Speech API error: %s", api_error, exc_info=True)
+                    raise
+                
+                if not state['restart']:
+                    break
+                logger.info(
+                    "Streaming limit reached after stream #%d; reconnecting and replaying %d bytes",
+                    stream_count, sum(len(payload) for _, payload in pending_audio),
+                )
+            
+            logger.info("Processed %d responses from Google Speech API", response_count)
+            
+        except Exception as e:
+            logger.error("Error in streaming transcription: %s", e)
             raise
     
+    @staticmethod
+    def _stream_result(
+        response: speech.StreamingRecognizeResponse,
+        response_count: int,
+    ) -> Optional[TranscriptionResult]:
+        """
+        Convert a streaming response into a typed result.
+        
+        Returns None for responses that carry no transcript.
+        """
+        # proto-plus builds a new wrapper on every field access, so each
+        # repeated field is read once into a local
+        results = response.results
+        if not results:
+            logger.debug("Response #%d: no results", response_count)
+            return None
+        
+        # The results list is consecutive
+        result = results[0]
+        alternatives = result.alternatives
+        
+        if not alternatives:
+            logger.debug("Response #%d: no alternatives", response_count)
+            return None
+        
+        # Get the top alternative
+        alternative = alternatives[0]
+        transcript = alternative.transcript
+        
+        if result.is_final:
+            # Final results carry confidence
+            logger.info("Got final result: %s", transcript)
+            return FinalTranscript(transcript, True, alternative.confidence)
+        
+        # Interim results carry stability
+        logger.debug("Got interim result: %s", transcript)
+        return InterimTranscript(transcript, False, result.stability)
+    
     def capture_and_transcribe_microphone(
         self,
         duration_seconds: Optional[int] = None,
         language_code: Optional[str] = None,
         single_utterance: Optional[bool] = None,
         chunk_size: int = 1024,
-    ) -> Generator[dict, None, None]:
+    ) -> Generator[TranscriptionResult, None, None]:
         """
         Capture audio from microphone and transcribe in real-time.
         
@@ -202,77 +605,130 @@ class SpeechToTextService:
             chunk_size: Audio chunk size in bytes
             
         Yields:
-            Dictionary containing transcription results
+            Transcription results (see transcribe_audio_stream)
         """
-        # Lazy import pyaudio only when needed (not available in Cloud Run)
+        # Lazy import sounddevice only when needed (not available in Cloud Run;
+        # importing it also fails with OSError when the PortAudio library is missing)
         try:
-            import pyaudio
-        except ImportError:
+            import sounddevice as sd
+        except (ImportError, OSError):
             raise RuntimeError(
-                "PyAudio is not available. Microphone capture is not supported in this environment. "
-                "This feature is only available in local development with PyAudio installed."
+                "sounddevice is not available. Microphone capture is not supported in this environment. "
+                "This feature is only available in local development with sounddevice (PortAudio) installed."
             )
         
         # Audio recording parameters
-        sample_rate = getattr(settings, 'SPEECH_SAMPLE_RATE', 16000)
-        audio_format = pyaudio.paInt16
+        sample_rate = _DEFAULT_SAMPLE_RATE
         channels = 1
         
-        # Initialize PyAudio
-        audio = pyaudio.PyAudio()
+        # PortAudio delivers captured buffers from its own thread; the callback
+        # only hands them off, so Python never has to keep pace with the device.
+        # Single producer / single consumer: deque.append and popleft are atomic,
+        # so the audio thread never waits on a lock held by the consumer; the
+        # event only wakes the consumer when it has drained the buffer.
+        # Bounded to ~2 seconds of audio: if the consumer stalls, the oldest
+        # buffers are overwritten instead of memory growing without limit
+        frames_per_buffer = chunk_size * 2
+        max_buffers = max(1, (sample_rate * 2) // frames_per_buffer)
+        audio_buffers: deque = deque(maxlen=max_buffers)
+        data_ready = threading.Event()
+        capture_stats = {'overflows': 0, 'dropped': 0}
+        
+        def fill_buffer(indata, frames, time_info, status):
+            """sounddevice stream callback: hand captured audio to the generator."""
+            if status.input_overflow:
+                capture_stats['overflows'] += 1
+            if len(audio_buffers) == max_buffers:
+                capture_stats['dropped'] += 1
+            # indata is only valid during the callback, so copy it out
+            audio_buffers.append(bytes(indata))
+            data_ready.set()
         
         try:
-            # Open audio stream from microphone
-            stream = audio.open(
-                format=audio_format,
+            # Open audio stream from microphone in callback mode, with a doubled
+            # block so PortAudio can absorb scheduling jitter without overruns.
+            # The context manager starts the stream and stops/closes it on exit
+            with sd.RawInputStream(
+                samplerate=sample_rate,
+                blocksize=frames_per_buffer,
+                dtype='int16',
                 channels=channels,
-                rate=sample_rate,
-                input=True,
-                frames_per_buffer=chunk_size,
-            )
-            
-            logger.info("Started microphone recording...")
-            
-            # Audio generator
-            def audio_generator():
-                """Generator that reads audio from microphone."""
-                chunks_count = 0
-                max_chunks = None
+                callback=fill_buffer,
+            ):
+                logger.info("Started microphone recording...")
                 
-                if duration_seconds:
-                    max_chunks = int(sample_rate / chunk_size * duration_seconds)
+                # Audio generator
+                def audio_generator():
+                    """Generator that yields audio captured by the stream callback."""
+                    bytes_read = 0
+                    max_bytes = None
+                    # 16-bit samples: 2 bytes per frame per channel
+                    bytes_per_second = sample_rate * 2 * channels
                 
-                while True:
-                    if max_chunks and chunks_count >= max_chunks:
-                        break
+                    if duration_seconds:
+                        max_bytes = int(bytes_per_second * duration_seconds)
+                
+                    # Silence gate state, measured in bytes of audio rather than wall time
+                    vad_enabled = _VAD_ENABLED
+                    vad_threshold_db = _VAD_THRESHOLD_DB
+                    hangover_bytes = int(bytes_per_second * _VAD_SILENCE_SECONDS)
+                    keepalive_bytes = int(bytes_per_second * _VAD_KEEPALIVE_SECONDS)
+                    heard_speech = False
+                    silence_bytes = 0
+                    skipped_bytes = 0
+                
+                    while True:
+                        if max_bytes and bytes_read >= max_bytes:
+                            break
+                    
+                        if not audio_buffers:
+                            data_ready.clear()
+                            # Re-check after clearing so a wake-up set in between is not lost
+                            if not audio_buffers and not data_ready.wait(timeout=1.0):
+                                logger.error("Error reading audio: no data from microphone")
+                                break
+                        data = audio_buffers.popleft()
+                        bytes_read += len(data)
+                    
+                        if vad_enabled:
+                            if _level_db(data) >= vad_threshold_db:
+                                heard_speech = True
+                                silence_bytes = 0
+                            else:
+                                silence_bytes += len(data)
+                                if silence_bytes >= hangover_bytes:
+                                    if single_utterance and heard_speech:
+                                        # End of the utterance: close the request stream
+                                        # so the service finalizes without waiting
+                                        break
+                                    # Drop silence, but keep sending a chunk now and
+                                    # then so the service does not time the stream out
+                                    if skipped_bytes < keepalive_bytes:
+                                        skipped_bytes += len(data)
+                                        continue
+                            skipped_bytes = 0
                     
-                    try:
-                        data = stream.read(chunk_size, exception_on_overflow=False)
                         yield data
-                        chunks_count += 1
-                    except Exception as e:
-                        logger.error(f"Error reading audio: {str(e)}")
-                        break
             
-            # Transcribe the audio stream
-            for result in self.transcribe_audio_stream(
-                audio_generator=audio_generator(),
-                language_code=language_code,
-                sample_rate=sample_rate,
-                single_utterance=single_utterance,
-            ):
-                yield result
+                # Transcribe the audio stream
+                for result in self.transcribe_audio_stream(
+                    audio_generator=audio_generator(),
+                    language_code=language_code,
+                    sample_rate=sample_rate,
+                    single_utterance=single_utterance,
+                ):
+                    yield result
                 
-                # Stop if single utterance and final result received
-                if single_utterance and result['is_final']:
-                    break
+                    # Stop if single utterance and final result received
+                    if single_utterance and result.is_final:
+                        break
         
         finally:
-            # Clean up
-            if 'stream' in locals():
-                stream.stop_stream()
-                stream.close()
-            audio.terminate()
+            if capture_stats['overflows'] or capture_stats['dropped']:
+                logger.warning(
+                    "Microphone capture lost audio - input overflows: %d, buffers dropped: %d",
+                    capture_stats['overflows'], capture_stats['dropped'],
+                )
             logger.info("Stopped microphone recording")
     
     def transcribe_audio_file(
@@ -295,50 +751,63 @@ class SpeechToTextService:
             Dictionary containing transcription result
         """
         try:
-            # Build recognition config
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=sample_rate or getattr(settings, 'SPEECH_SAMPLE_RATE', 16000),
-                language_code=language_code or getattr(settings, 'SPEECH_LANGUAGE_CODE', 'en-US'),
-                enable_automatic_punctuation=(
-                    enable_automatic_punctuation 
-                    if enable_automatic_punctuation is not None 
-                    else getattr(settings, 'SPEECH_ENABLE_AUTOMATIC_PUNCTUATION', True)
-                ),
-                model=getattr(settings, 'SPEECH_MODEL', 'default'),
+            config = self._build_recognition_config(
+                language_code=language_code,
+                sample_rate=sample_rate,
+                enable_automatic_punctuation=enable_automatic_punctuation,
             )
-            
             audio = speech.RecognitionAudio(content=audio_content)
             
             # Perform recognition
             response = self.client.recognize(config=config, audio=audio)
-            
-            # Extract results
-            if not response.results:
-                return {
-                    'transcript': '',
-                    'confidence': 0.0,
-                }
-            
-            result = response.results[0]
-            alternative = result.alternatives[0]
-            
-            return {
-                'transcript': alternative.transcript,
-                'confidence': alternative.confidence,
-            }
+            return self._file_result(response)
             
         except Exception as e:
-            logger.error(f"Error transcribing audio file: {str(e)}")
+            logger.error("Error transcribing audio file: %s", e)
             raise
     
+    @staticmethod
+    def _file_result(response: speech.RecognizeResponse) -> dict:
+        """Extract the top transcript from a RecognizeResponse."""
+        results = response.results
+        if not results:
+            return {
+                'transcript': '',
+                'confidence': 0.0,
+            }
+        
+        alternative = results[0].alternatives[0]
+        
+        return {
+            'transcript': alternative.transcript,
+            'confidence': alternative.confidence,
+        }
+    
+    async def warm_up(self, timeout: float = 10.0) -> None:
+        """
+        Open both gRPC connections ahead of the first request.
+        
+        Must run on the event loop that serves requests: the async client
+        (used by WebSocket streaming) is created here and its grpc.aio
+        channel binds to this loop. The sync channel (microphone and file
+        paths) is connected on a worker thread at the same time. Raises
+        asyncio.TimeoutError or grpc.FutureTimeoutError after timeout seconds.
+        """
+        async_channel = self._get_async_client().transport.grpc_channel
+        await asyncio.gather(
+            asyncio.wait_for(async_channel.channel_ready(), timeout),
+            asyncio.to_thread(
+                lambda: grpc.channel_ready_future(_speech_channel()).result(timeout=timeout)
+            ),
+        )
+    
     def check_health(self) -> dict:
         """Check service health."""
         return {
             'status': 'healthy',
             'service': 'Google Cloud Speech-to-Text',
-            'language': getattr(settings, 'SPEECH_LANGUAGE_CODE', 'en-US'),
-            'sample_rate': getattr(settings, 'SPEECH_SAMPLE_RATE', 16000),
+            'language': _DEFAULT_LANGUAGE_CODE,
+            'sample_rate': _DEFAULT_SAMPLE_RATE,
         }
 
 
@@ -3,6 +3,7 @@ Vertex AI Live API service for real-time voice conversations.
 Handles bidirectional audio streaming with Gemini Live models.
 """
 import asyncio
+import logging
 from typing import AsyncIterator, Optional, Callable, List
 from google import genai
 from google.genai.types import (
@@ -234,9 +235,11 @@ class VertexLiveSession:
                 timeout=timeout
             )
             
-            # Debug: Log the message structure
-            logger.debug(f"Received message type: {type(message)}")
-            logger.debug(f"Message attributes: {dir(message)}")
+            # Debug: Log the message structure (dir() is costly, so only when enabled)
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Received message type: %s", type(message))
+                logger.debug("Message attributes: %s", dir(message))
             
             # Extract audio from the response
             server_content = getattr(message, "server_content", None)
@@ -244,7 +247,7 @@ class VertexLiveSession:
                 logger.debug("No server_content in message")
                 return None
             
-            logger.debug(f"server_content type: {type(server_content)}")
+            logger.debug("server_content type: %s", type(server_content))
             
             model_turn = getattr(server_content, "model_turn", None)
             if not model_turn:
@@ -255,26 +258,28 @@ class VertexLiveSession:
                 logger.debug("No parts in model_turn")
                 return None
             
-            logger.debug(f"Found {len(model_turn.parts)} parts in model_turn")
+            logger.debug("Found %d parts in model_turn", len(model_turn.parts))
             
             # Collect all audio parts
             audio_chunks = []
             for i, part in enumerate(model_turn.parts):
-                logger.debug(f"Part {i}: has inline_data={hasattr(part, 'inline_data')}")
+                if debug:
+                    logger.debug("Part %d: has inline_data=%s", i, hasattr(part, 'inline_data'))
                 if hasattr(part, 'inline_data') and part.inline_data:
                     mime_type = part.inline_data.mime_type if hasattr(part.inline_data, 'mime_type') else 'unknown'
-                    logger.debug(f"Part {i} mime_type: {mime_type}")
+                    logger.debug("Part %d mime_type: %s", i, mime_type)
                     if mime_type.startswith("audio/pcm"):
-                        data_len = len(part.inline_data.data) if hasattr(part.inline_data, 'data') else 0
-                        logger.debug(f"Part {i} audio data length: {data_len}")
+                        if debug:
+                            data_len = len(part.inline_data.data) if hasattr(part.inline_data, 'data') else 0
+                            logger.debug("Part %d audio data length: %d", i, data_len)
                         audio_chunks.append(part.inline_data.data)
-                elif hasattr(part, 'text'):
-                    logger.debug(f"Part {i} has text: {part.text[:100] if part.text else 'empty'}")
+                elif debug and hasattr(part, 'text'):
+                    logger.debug("Part %d has text: %s", i, part.text[:100] if part.text else 'empty')
             
             if audio_chunks:
                 # Combine all audio chunks
                 combined_audio = b''.join(audio_chunks)
-                logger.info(f"✓ Received audio: {len(combined_audio)} bytes")
+                logger.info("✓ Received audio: %d bytes", len(combined_audio))
                 return combined_audio
             else:
                 logger.debug("No audio chunks found in parts")
@@ -27,6 +27,10 @@ class WebSearchClient:
                 "Web search enrichment will fail.")
             # In a real job, you might raise an exception here or set a flag to skip search.
 
+        # One keep-alive session for every query, so repeated searches reuse
+        # the TLS connection to the search API instead of reconnecting per call
+        self.session = requests.Session()
+
     def _run_search(self, query: str) -> Dict[str, Any]:
         """Executes the Google Custom Search query."""
         if not self.api_key or not self.cse_id:
@@ -43,9 +47,9 @@ class WebSearchClient:
             # Note: This is a synchronous call. For 870 doctors, you will need
             # to run the outer enrichment loop in jobs/indexer.py asynchronously
             # (e.g., using asyncio) to handle this latency efficiently.
-            response = requests.get(SEARCH_API_ENDPOINT,
-                                    params=params,
-                                    timeout=10)
+            response = self.session.get(SEARCH_API_ENDPOINT,
+                                        params=params,
+                                        timeout=10)
             response.raise_for_status(
             )  # Raise HTTPError for bad responses (4xx or 5xx)
             return response.json()
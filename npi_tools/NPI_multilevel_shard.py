@@ -6,11 +6,30 @@ Solves the issue of single specialty exceeding 1200 records
 Strategy: Specialty sharding + ZIP code subdivision (when specialty reaches 1200 limit)
 """
 
+import hashlib
 import json
+import logging
+import os
+import random
+import threading
 import time
 import sys
 import requests
-from typing import Dict, Any, List, Set
+from urllib.parse import urlencode
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import orjson  # Optional: 2-5x faster JSON decode/encode
+except ImportError:
+    orjson = None
+
+try:
+    from requests_cache import CachedSession  # Optional: replay API responses across runs
+except ImportError:
+    CachedSession = None
 
 # ====== Configuration ======
 CITY = "New York"
@@ -22,21 +41,147 @@ PAGE_LIMIT = 200
 REQUEST_TIMEOUT = 30
 MAX_RETRIES = 5
 RETRY_BACKOFF = 2.0
+RETRY_MAX_SLEEP = 30.0
+RETRY_STATUSES = {403, 429, 500, 502, 503, 504}  # The registry throttles with 403
+MAX_WORKERS = 8  # Concurrent specialty shards
+PAGE_WINDOW = 3  # Pages fetched concurrently within one query
+MAX_IN_FLIGHT = MAX_WORKERS * 2  # Shards submitted ahead of the writer (backpressure)
+RATE_LIMIT = 10.0  # Requests per second across all workers
+RATE_BURST = 10  # Requests allowed back-to-back before the rate applies
+CACHE_DIR = ".npi_cache"  # Discovery results cache (postal codes / specialties)
+CACHE_TTL = 24 * 3600  # Seconds before a cached discovery result is refetched
 OUTPUT_FILE = None
 # ====================
 
+API_BASE = "https://npiregistry.cms.hhs.gov/api/"
+MAX_RECORDS_PER_QUERY = 1200  # API hard limit: skip beyond this repeats data
+RESULT_COUNT_WIDTH = 10  # Room reserved for result_count in the streamed output
 
-def build_params(city: str, state: str, skip: int, **kwargs) -> Dict[str, str]:
-    """Build API request parameters"""
-    params = {
-        "version": API_VERSION,
-        "city": city,
-        "state": state,
-        "enumeration_type": ENUMERATION_TYPE,
-        "address_purpose": ADDRESS_PURPOSE,
-        "limit": str(PAGE_LIMIT),
-        "skip": str(skip),
-    }
+# The registry returns the purpose in canonical case; a frozenset lookup
+# avoids allocating an .upper() copy for every address scanned
+_LOCATION_VARIANTS = frozenset({"LOCATION", "Location", "location"})
+
+# Parameters shared by every query; per-query values are layered on a copy
+_BASE_PARAMS = {
+    "version": API_VERSION,
+    "enumeration_type": ENUMERATION_TYPE,
+    "address_purpose": ADDRESS_PURPOSE,
+    "limit": str(PAGE_LIMIT),
+}
+
+
+logger = logging.getLogger(__name__)
+
+
+# Shared HTTP session: keep-alive connections to the NPI registry are reused
+# across every page/shard instead of paying a TCP + TLS handshake per call.
+# All traffic goes to one host, so a single pool sized to the page pool is
+# enough; pool_block makes extra threads wait for a connection instead of
+# opening throwaway ones the pool would then discard
+HTTP_POOL_SIZE = MAX_WORKERS * PAGE_WINDOW
+if CachedSession is not None:
+    # Repeat runs for the same city are served from a local SQLite file
+    SESSION = CachedSession(
+        os.path.join(CACHE_DIR, "http_cache"),
+        backend="sqlite",
+        expire_after=CACHE_TTL,
+        allowable_methods=("GET",),
+    )
+else:
+    SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=HTTP_POOL_SIZE,
+    pool_block=True,
+    max_retries=0,
+))
+SESSION.headers.update({
+    "Accept": "application/json",
+    "User-Agent": "smarterdoc-npi-tools/1.0",
+})
+
+# Page fetches are leaf tasks, kept apart from the shard pool so a shard
+# waiting on its pages can never starve them of workers
+PAGE_POOL = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: refills at `rate` tokens/s, holds at most `burst`"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Block until a token is available, then take it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # A negative balance is this caller's place in line; sleeping
+            # outside the lock lets later callers reserve their own slots
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait_time:
+            time.sleep(wait_time)
+
+
+# One limiter shared by every thread replaces the fixed per-call sleeps:
+# requests go out as fast as the quota allows and no faster
+RATE_LIMITER = TokenBucket(RATE_LIMIT, RATE_BURST)
+
+
+def _cache_path(*key_parts: str) -> str:
+    digest = hashlib.sha1("|".join(key_parts).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def cache_load(*key_parts: str) -> Optional[List[str]]:
+    """Load a cached discovery result, or None if missing/expired"""
+    path = _cache_path(*key_parts)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_store(value: List[str], *key_parts: str) -> None:
+    """Persist a discovery result (written atomically, workers may race)"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(*key_parts)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def clear_cache() -> None:
+    """Drop cached discovery results and, if enabled, cached API responses"""
+    if CachedSession is not None:
+        SESSION.cache.clear()
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith(".json"):
+            os.remove(os.path.join(CACHE_DIR, name))
+
+
+def build_query_url(city: str, state: str, **kwargs) -> str:
+    """
+    Build the encoded API URL for a query, without the skip parameter
+    Encoded once per query; each page only appends "&skip=N"
+    """
+    params = _BASE_PARAMS.copy()
+    params["city"] = city
+    params["state"] = state
     
     # Add filter parameters
     if kwargs.get("taxonomy_description"):
@@ -46,315 +191,407 @@ def build_params(city: str, state: str, skip: int, **kwargs) -> Dict[str, str]:
     if kwargs.get("postal_code"):
         params["postal_code"] = kwargs["postal_code"]
     
-    return params
+    return f"{API_BASE}?{urlencode(params)}"
 
 
-def request_with_retries(url: str, params: Dict[str, str]) -> Dict[str, Any]:
-    """HTTP request with retry mechanism"""
+def _decode(r: requests.Response) -> Dict[str, Any]:
+    """Decode a JSON response body"""
+    return orjson.loads(r.content) if orjson else r.json()
+
+
+def _from_cache(url: str, params: Optional[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    """Response replayed from the local HTTP cache, or None on a miss"""
+    if CachedSession is None:
+        return None
+    # only_if_cached never touches the network; a miss comes back as a 504
+    r = SESSION.get(url, params=params, only_if_cached=True)
+    if r.status_code != 200:
+        return None
+    try:
+        return _decode(r)
+    except ValueError:
+        return None
+
+
+def request_with_retries(url: str, params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    HTTP request with retry mechanism
+    Only transient failures (connection errors, timeouts, 429/5xx) are retried;
+    the server's Retry-After wins over the jittered exponential backoff.
+    Cached responses are returned without taking a rate-limit token
+    """
+    cached = _from_cache(url, params)
+    if cached is not None:
+        return cached
+    
     last_err = None
     for i in range(MAX_RETRIES):
+        # Multiplicative jitter keeps concurrent workers from retrying in lockstep
+        delay = min(RETRY_MAX_SLEEP, RETRY_BACKOFF ** i * random.uniform(0.5, 1.5))
+        RATE_LIMITER.acquire()
         try:
-            r = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
+            r = SESSION.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            if r.status_code not in RETRY_STATUSES:
+                r.raise_for_status()
+                return _decode(r)
+            last_err = requests.HTTPError(f"HTTP {r.status_code}", response=r)
+            retry_after = r.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    delay = min(RETRY_MAX_SLEEP, float(retry_after))
+                except ValueError:
+                    pass  # HTTP-date form, keep the computed backoff
+        except (requests.ConnectionError, requests.Timeout, ValueError) as e:
             last_err = e
-            time.sleep(RETRY_BACKOFF ** i)
+        if i < MAX_RETRIES - 1:
+            logger.warning("Retry %d/%d after %.2fs: %s", i + 1, MAX_RETRIES - 1, delay, last_err)
+            time.sleep(delay)
     raise RuntimeError(f"Request failed (retried {MAX_RETRIES} times): {last_err}")
 
 
 def fetch_single_query(city: str, state: str, **query_params) -> List[Dict[str, Any]]:
-    """Fetch all data for a single query (max 1200 records)"""
-    base = "https://npiregistry.cms.hhs.gov/api/"
+    """
+    Fetch all data for a single query (max 1200 records)
+    The first page is fetched alone; once it comes back full, the following
+    pages are requested PAGE_WINDOW at a time instead of one after another
+    """
     all_records: List[Dict[str, Any]] = []
-    seen_npi: Set[str] = set()
-    skip = 0
-    consecutive_empty = 0
-    MAX_CONSECUTIVE_EMPTY = 3
-    MAX_SKIP = 1200
     
-    while skip < MAX_SKIP:
-        params = build_params(city, state, skip, **query_params)
-        data = request_with_retries(base, params)
-        batch = data.get("results", []) or []
-        
-        added = 0
-        for rec in batch:
-            npi = rec.get("number")
-            if npi and npi not in seen_npi:
-                all_records.append(rec)
-                seen_npi.add(npi)
-                added += 1
-        
-        # Check if should continue
-        if len(batch) == 0 or added == 0:
-            consecutive_empty += 1
-            if consecutive_empty >= MAX_CONSECUTIVE_EMPTY:
-                break
-        else:
-            consecutive_empty = 0
-        
-        if len(batch) < PAGE_LIMIT:
-            break
+    query_url = build_query_url(city, state, **query_params)
+    
+    def fetch_page(skip: int) -> List[Dict[str, Any]]:
+        data = request_with_retries(f"{query_url}&skip={skip}")
+        return data.get("results", []) or []
+    
+    # Pagination within one query is stable, so pages carry no duplicates of
+    # each other; deduplication happens once, globally, in fetch_all_multilevel
+    window = [0]
+    while window:
+        # Pages are merged in order; anything after a short page is discarded
+        for batch in PAGE_POOL.map(fetch_page, window):
+            all_records.extend(batch)
+            
+            # A short (or empty) page is the last one for this query
+            if len(batch) < PAGE_LIMIT:
+                return all_records
         
-        skip += PAGE_LIMIT
-        time.sleep(0.3)  # Avoid triggering API limits
+        skip = window[-1] + PAGE_LIMIT
+        window = list(range(skip, min(skip + PAGE_WINDOW * PAGE_LIMIT, MAX_RECORDS_PER_QUERY), PAGE_LIMIT))
     
     return all_records
 
 
-def get_postal_codes_for_taxonomy(city: str, state: str, taxonomy_desc: str) -> List[str]:
-    """Get all postal codes for a specific specialty"""
-    base = "https://npiregistry.cms.hhs.gov/api/"
-    params = {
-        "version": API_VERSION,
-        "city": city,
-        "state": state,
-        "enumeration_type": ENUMERATION_TYPE,
-        "address_purpose": ADDRESS_PURPOSE,
-        "taxonomy_description": taxonomy_desc,
-        "limit": "200",
-        "skip": "0",
+def extract_postal_codes(records: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Collect 5-digit location postal codes from a batch of records"""
+    # "or ()" reuses the empty-tuple singleton instead of allocating a list per record
+    return {
+        postal[:5]
+        for rec in records
+        for addr in rec.get("addresses") or ()
+        if addr.get("address_purpose") in _LOCATION_VARIANTS and (postal := addr.get("postal_code"))
     }
-    
-    try:
-        data = request_with_retries(base, params)
-        results = data.get("results", []) or []
-        
-        postal_set = set()
-        for rec in results:
-            addresses = rec.get("addresses", []) or []
-            for addr in addresses:
-                if addr.get("address_purpose", "").upper() == "LOCATION":
-                    postal = addr.get("postal_code", "")
-                    if postal:
-                        postal_set.add(postal[:5])
-        
-        postal_list = sorted(list(postal_set))
-        return postal_list
-        
-    except Exception as e:
-        print(f"  [Warning] Failed to get postal codes: {e}")
-        return []
 
 
-def fetch_taxonomy_with_subdivision(city: str, state: str, taxonomy: str,
-                                    global_seen_npi: Set[str]) -> List[Dict[str, Any]]:
+def fetch_shard(city: str, state: str, taxonomy: str, postal: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    Fetch data for a single specialty, subdivide by postal code if reaches 1200 limit
+    Fetch one shard: a specialty, or a specialty + postal code subdivision
+    Runs on a worker thread, so global deduplication is left to the caller
     """
-    all_records: List[Dict[str, Any]] = []
-    
-    display_name = f"{taxonomy[:60]}..." if len(taxonomy) > 60 else taxonomy
-    print(f"  [Query] {display_name}", end=" ... ")
-    
-    # Try direct fetch by specialty description
-    records = fetch_single_query(city, state, taxonomy_description=taxonomy)
-    
-    # If reaches 1200, there may be more data, need to subdivide by postal code
-    if len(records) >= 1200:
-        print(f"[Reached 1200 limit, subdividing by postal code]")
-        
-        # Get all postal codes for this specialty
-        postal_codes = get_postal_codes_for_taxonomy(city, state, taxonomy)
-        
-        if postal_codes:
-            print(f"    [Info] Found {len(postal_codes)} postal codes, querying each...")
-            
-            for postal in postal_codes:
-                print(f"      [Postal] {postal}", end=" ... ")
-                postal_records = fetch_single_query(
-                    city, state,
-                    taxonomy_description=taxonomy,
-                    postal_code=postal
-                )
-                
-                # Deduplicate and add to results
-                added = 0
-                for rec in postal_records:
-                    npi = rec.get("number")
-                    if npi and npi not in global_seen_npi:
-                        all_records.append(rec)
-                        global_seen_npi.add(npi)
-                        added += 1
-                
-                print(f"{added} new records")
-                time.sleep(0.3)  # Avoid triggering API limits
-        else:
-            print(f"    [Warning] Failed to get postal codes, using original 1200 records")
-            # Deduplicate and add
-            for rec in records:
-                npi = rec.get("number")
-                if npi and npi not in global_seen_npi:
-                    all_records.append(rec)
-                    global_seen_npi.add(npi)
-    else:
-        print(f"{len(records)} records")
-        # Deduplicate and add
-        for rec in records:
-            npi = rec.get("number")
-            if npi and npi not in global_seen_npi:
-                all_records.append(rec)
-                global_seen_npi.add(npi)
-    
-    return all_records
+    if postal is None:
+        return fetch_single_query(city, state, taxonomy_description=taxonomy)
+    return fetch_single_query(city, state, taxonomy_description=taxonomy, postal_code=postal)
+
+
+def extract_taxonomies(records: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Collect specialty descriptions from a batch of records"""
+    return set(filter(None, (
+        tax.get("desc", "") or tax.get("taxonomy_description", "")
+        for rec in records
+        for tax in rec.get("taxonomies") or ()
+    )))
 
 
-def get_all_postal_codes(city: str, state: str) -> List[str]:
-    """Get all postal codes (traverse first 1200 records)"""
-    print(f"\n[Step 1] Fetching all postal codes for {city}, {state}...")
+def get_all_postal_codes(city: str, state: str) -> Tuple[List[str], Set[str], List[Dict[str, Any]]]:
+    """
+    Get all postal codes (traverse first 1200 records)
+    The same pass also harvests the specialties on those records, and if the
+    city has fewer than 1200 records it returns all of them, since the scan
+    has then already retrieved the whole city
+    """
+    logger.info("[Step 1] Fetching all postal codes for %s, %s...", city, state)
+    
+    cached = cache_load("postal_codes", city, state)
+    cached_taxonomies = cache_load("city_taxonomies", city, state)
+    if cached is not None and cached_taxonomies is not None:
+        logger.info("Found %d unique postal codes (cached)", len(cached))
+        return cached, set(cached_taxonomies), []
     
-    base = "https://npiregistry.cms.hhs.gov/api/"
+    query_url = build_query_url(city, state)
     postal_set = set()
+    taxonomy_set = set()
+    city_records: List[Dict[str, Any]] = []
+    city_complete = False
+    complete = True
     skip = 0
-    MAX_SKIP = 1200
     
-    while skip < MAX_SKIP:
-        params = {
-            "version": API_VERSION,
-            "city": city,
-            "state": state,
-            "enumeration_type": ENUMERATION_TYPE,
-            "address_purpose": ADDRESS_PURPOSE,
-            "limit": "200",
-            "skip": str(skip),
-        }
-        
+    while skip < MAX_RECORDS_PER_QUERY:
         try:
-            data = request_with_retries(base, params)
+            data = request_with_retries(f"{query_url}&skip={skip}")
             results = data.get("results", []) or []
             
-            if not results:
-                break
-            
-            for rec in results:
-                addresses = rec.get("addresses", []) or []
-                for addr in addresses:
-                    if addr.get("address_purpose", "").upper() == "LOCATION":
-                        postal = addr.get("postal_code", "")
-                        if postal:
-                            postal_set.add(postal[:5])  # Only take first 5 digits
+            # Only take first 5 digits
+            postal_set |= extract_postal_codes(results)
+            taxonomy_set |= extract_taxonomies(results)
+            city_records.extend(results)
             
-            if len(results) < 200:
+            if len(results) < PAGE_LIMIT:
+                city_complete = True
                 break
             
-            skip += 200
-            time.sleep(0.2)
+            skip += PAGE_LIMIT
             
         except Exception as e:
-            print(f"[Warning] Failed to get postal codes at skip={skip}: {e}")
+            logger.warning("Failed to get postal codes at skip=%d: %s", skip, e)
+            complete = False
             break
     
-    postal_list = sorted(list(postal_set))
-    print(f"[Info] Found {len(postal_list)} unique postal codes\n")
-    return postal_list
+    postal_list = sorted(postal_set)
+    # A complete city is returned whole and never needs the discovery cache;
+    # caching it would only make a rerun skip that shortcut
+    if complete and postal_list and not city_complete:
+        cache_store(postal_list, "postal_codes", city, state)
+        cache_store(sorted(taxonomy_set), "city_taxonomies", city, state)
+    logger.info("Found %d unique postal codes", len(postal_list))
+    return postal_list, taxonomy_set, city_records if city_complete else []
 
 
-def get_all_taxonomies(city: str, state: str, postal_codes: List[str]) -> List[str]:
-    """Collect complete specialty list from all postal codes (using description)"""
-    print(f"[Step 2] Collecting specialty list from all postal codes...")
+def fetch_postal_taxonomies(city: str, state: str, postal: str) -> Tuple[List[Dict[str, Any]], Set[str]]:
+    """First 200 records of one postal code and their specialties (runs on a worker thread)"""
+    data = request_with_retries(f"{build_query_url(city, state, postal_code=postal)}&skip=0")
+    results = data.get("results", []) or []
+    return results, extract_taxonomies(results)
+
+
+def get_all_taxonomies(
+    city: str, state: str, postal_codes: List[str], known_taxonomies: Set[str]
+) -> Tuple[List[str], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Collect complete specialty list from all postal codes (using description)
+    known_taxonomies (found in step 1) are merged in, and the merged list is
+    what gets cached, so a cache hit returns the same list as a fresh scan
+    Also returns the records of every postal code whose first page was short:
+    that page is the postal code's entire result set, so any specialty +
+    postal code subdivision of it needs no further request
+    """
+    logger.info("[Step 2] Collecting specialty list from all postal codes (%d workers)...", MAX_WORKERS)
     
-    base = "https://npiregistry.cms.hhs.gov/api/"
-    taxonomy_set = set()
+    cache_key = ("taxonomies", city, state, ",".join(postal_codes))
+    cached = cache_load(*cache_key)
+    if cached is not None:
+        logger.info("Total found %d unique specialties (cached)", len(cached))
+        return cached, {}
     
-    # Collect specialties from first 200 records of each postal code
-    for i, postal in enumerate(postal_codes, 1):
-        print(f"  [Postal {i}/{len(postal_codes)}] {postal}", end=" ... ")
-        
-        params = {
-            "version": API_VERSION,
-            "city": city,
-            "state": state,
-            "enumeration_type": ENUMERATION_TYPE,
-            "address_purpose": ADDRESS_PURPOSE,
-            "postal_code": postal,
-            "limit": "200",
-            "skip": "0",
-        }
-        
-        try:
-            data = request_with_retries(base, params)
-            results = data.get("results", []) or []
-            
-            count_before = len(taxonomy_set)
-            for rec in results:
-                taxonomies = rec.get("taxonomies", []) or []
-                for tax in taxonomies:
-                    desc = tax.get("desc", "") or tax.get("taxonomy_description", "")
-                    if desc:
-                        taxonomy_set.add(desc)
-            
-            new_count = len(taxonomy_set) - count_before
-            print(f"{len(results)} records, {new_count} new specialties, total {len(taxonomy_set)}")
-            time.sleep(0.2)
+    taxonomy_set = set(known_taxonomies)
+    complete_postals: Dict[str, List[Dict[str, Any]]] = {}
+    complete = True
+    
+    # Collect specialties from first 200 records of each postal code; the
+    # lookups are independent, so they run concurrently and are merged here
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(fetch_postal_taxonomies, city, state, postal)
+            for postal in postal_codes
+        ]
+        for i, (postal, future) in enumerate(zip(postal_codes, futures), 1):
+            try:
+                results, found = future.result()
+            except Exception as e:
+                logger.warning("  [Postal %d/%d] %s ... Failed: %s", i, len(postal_codes), postal, e)
+                complete = False
+                continue
             
-        except Exception as e:
-            print(f"Failed: {e}")
+            new_count = len(found - taxonomy_set)
+            taxonomy_set |= found
+            if len(results) < PAGE_LIMIT:
+                complete_postals[postal] = results
+            logger.info("  [Postal %d/%d] %s ... %d records, %d new specialties, total %d",
+                        i, len(postal_codes), postal, len(results), new_count, len(taxonomy_set))
     
-    taxonomy_list = sorted(list(taxonomy_set))
-    print(f"\n[Info] Total found {len(taxonomy_list)} unique specialties\n")
-    return taxonomy_list
+    taxonomy_list = sorted(taxonomy_set)
+    if complete and taxonomy_list:
+        cache_store(taxonomy_list, *cache_key)
+    logger.info("Total found %d unique specialties", len(taxonomy_list))
+    return taxonomy_list, complete_postals
 
 
-def fetch_all_multilevel(city: str, state: str) -> List[Dict[str, Any]]:
-    """Fetch all data using multi-level sharding strategy"""
-    all_records: List[Dict[str, Any]] = []
-    global_seen_npi: Set[str] = set()
+def dedup_records(records: List[Dict[str, Any]], seen_npi: Set[int]) -> Iterator[Dict[str, Any]]:
+    """Yield records whose NPI is not in seen_npi yet; returns how many were new"""
+    # One hash per record: a set grows only when the add is new
+    seen_before = len(seen_npi)
+    for rec in records:
+        npi = rec.get("number")
+        if not npi:
+            continue
+        size = len(seen_npi)
+        seen_npi.add(int(npi))
+        if len(seen_npi) != size:
+            yield rec
+    return len(seen_npi) - seen_before
+
+
+def fetch_all_multilevel(city: str, state: str) -> Iterator[Dict[str, Any]]:
+    """
+    Fetch all data using multi-level sharding strategy
+    Yields each unique NPI record as soon as its shard completes, so memory is
+    bounded by the dedup set rather than by the full result list
+    """
+    # NPIs are 10-digit numbers; int keys are far smaller and cheaper to hash than str
+    global_seen_npi: Set[int] = set()
     
-    print(f"\n{'='*70}")
-    print(f"Starting multi-level sharding query")
-    print(f"Target: {city}, {state}")
-    print(f"Strategy: Postal collection → Specialty discovery → Specialty sharding → Postal subdivision on limit")
-    print(f"{'='*70}\n")
+    logger.info("Starting multi-level sharding query for %s, %s", city, state)
+    logger.info("Strategy: Postal collection → Specialty discovery → Specialty sharding → Postal subdivision on limit")
     
     # Step 1: Get all postal codes
-    postal_codes = get_all_postal_codes(city, state)
+    postal_codes, city_taxonomies, city_records = get_all_postal_codes(city, state)
+    
+    if city_records:
+        # The whole city fits under the 1200 limit: nothing left to shard
+        yield from dedup_records(city_records, global_seen_npi)
+        logger.info("City fully retrieved during postal code collection, %d records", len(global_seen_npi))
+        return
     
     if not postal_codes:
-        print("[Error] Failed to get postal code list")
-        return []
+        logger.error("Failed to get postal code list")
+        return
     
-    # Step 2: Collect complete specialty list from all postal codes
-    taxonomies = get_all_taxonomies(city, state, postal_codes)
+    # Step 2: Collect complete specialty list from all postal codes; the
+    # specialties already seen in step 1 are merged in rather than refetched
+    taxonomies, complete_postals = get_all_taxonomies(city, state, postal_codes, city_taxonomies)
     
     if not taxonomies:
-        print("[Error] Failed to get specialty list")
-        return []
+        logger.error("Failed to get specialty list")
+        return
+    
+    # Postal codes fully covered by discovery are emitted now and never subdivided
+    if complete_postals:
+        for records in complete_postals.values():
+            yield from dedup_records(records, global_seen_npi)
+        logger.info("%d postal codes fully retrieved during discovery, %d records",
+                    len(complete_postals), len(global_seen_npi))
     
     # Step 3: Query each specialty (subdivide by postal code if necessary)
-    print(f"[Step 3] Starting specialty data query...\n")
-    for i, taxonomy in enumerate(taxonomies, 1):
-        print(f"[{i}/{len(taxonomies)}]", end=" ")
-        
-        records = fetch_taxonomy_with_subdivision(
-            city, state, 
-            taxonomy,
-            global_seen_npi
-        )
-        all_records.extend(records)
-        
-        print(f"    [Cumulative] {len(all_records)} records")
+    # Shards run on a work queue: at most MAX_IN_FLIGHT are submitted at once,
+    # so finished-but-unwritten results cannot pile up when the writer is
+    # slower than the fetchers. Shards are consumed as they complete, and a
+    # specialty that hits the limit queues its postal subdivisions up front
+    logger.info("[Step 3] Starting specialty data query (%d workers)...", MAX_WORKERS)
+    pending = deque((taxonomy, None) for taxonomy in taxonomies)
+    in_flight: Dict[Future, Tuple[str, Optional[str]]] = {}
+    shards_done = 0
+    shards_failed = 0
+    shards_total = len(pending)
     
-    print(f"\n{'='*70}")
-    print(f"Query completed!")
-    print(f"Total unique NPIs: {len(all_records)} records")
-    print(f"{'='*70}\n")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while pending or in_flight:
+            while pending and len(in_flight) < MAX_IN_FLIGHT:
+                shard = pending.popleft()
+                in_flight[executor.submit(fetch_shard, city, state, *shard)] = shard
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                taxonomy, postal = in_flight.pop(future)
+                shards_done += 1
+                display_name = f"{taxonomy[:60]}..." if len(taxonomy) > 60 else taxonomy
+                if postal:
+                    display_name = f"{display_name} + {postal}"
+                try:
+                    records = future.result()
+                except Exception as e:
+                    # One shard that exhausted its retries must not abort the whole crawl
+                    shards_failed += 1
+                    logger.error("  [%d/%d] %s ... Failed: %s", shards_done, shards_total, display_name, e)
+                    continue
+                
+                if postal is None and len(records) >= MAX_RECORDS_PER_QUERY:
+                    # Reached 1200, there may be more data, need to subdivide by postal code.
+                    # The capped fetch already holds 1200 of this specialty's records; their
+                    # postal codes cover at least the first page a separate lookup would scan
+                    shard_postals = sorted(extract_postal_codes(records))
+                    if shard_postals:
+                        subdivide = [code for code in shard_postals if code not in complete_postals]
+                        logger.info("  [Query] %s ... [Reached 1200 limit, subdividing into %d postal codes, "
+                                    "%d already complete]",
+                                    display_name, len(subdivide), len(shard_postals) - len(subdivide))
+                        pending.extendleft((taxonomy, code) for code in reversed(subdivide))
+                        shards_total += len(subdivide)
+                        continue
+                    logger.warning("  %s: no postal codes found, using original 1200 records", display_name)
+                
+                added = yield from dedup_records(records, global_seen_npi)
+                
+                logger.info("  [%d/%d] %s ... %d records, %d new, cumulative %d records",
+                            shards_done, shards_total, display_name, len(records), added, len(global_seen_npi))
     
-    return all_records
+    if shards_failed:
+        logger.warning("%d shards failed after retries; the output is incomplete", shards_failed)
+    logger.info("Query completed! Total unique NPIs: %d records", len(global_seen_npi))
 
 
-def write_json(records: List[Dict[str, Any]], filepath: str) -> None:
-    """Write JSON file"""
-    output_data = {
-        "result_count": len(records),
-        "results": records
-    }
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+def _dump_record(rec: Dict[str, Any]) -> bytes:
+    """Serialize one record indented to sit inside the "results" array"""
+    if orjson:
+        data = orjson.dumps(rec, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(rec, indent=2, ensure_ascii=False).encode("utf-8")
+    # JSON strings never contain raw newlines, so this only touches layout
+    return b"    " + data.replace(b"\n", b"\n    ")
+
+
+def write_json(records: Iterable[Dict[str, Any]], filepath: str) -> int:
+    """
+    Stream records into a JSON file, returns the number of records written
+    result_count is unknown until the stream ends, so a fixed-width blank is
+    reserved for it and filled in afterwards; the file only appears under
+    its final name once complete
+    """
+    tmp_path = f"{filepath}.part"
+    count = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(b'{\n  "result_count": ')
+            count_offset = f.tell()
+            f.write(b" " * RESULT_COUNT_WIDTH + b',\n  "results": [')
+            for rec in records:
+                f.write(b",\n" if count else b"\n")
+                f.write(_dump_record(rec))
+                count += 1
+            f.write(b"\n  ]\n}" if count else b"]\n}")
+            f.seek(count_offset)
+            f.write(str(count).rjust(RESULT_COUNT_WIDTH).encode("ascii"))
+    except BaseException:
+        # Records are produced lazily, so a failed or interrupted crawl ends
+        # up here; leave no partial file behind
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.replace(tmp_path, filepath)
+    return count
+
+
+# Deletes every ASCII character that is not alphanumeric, "-" or "_"
+_FILENAME_DELETE = {
+    i: None for i in range(128)
+    if not (chr(i).isalnum() or chr(i) in ("-", "_"))
+}
 
 
 def sanitize_filename(s: str) -> str:
     """Sanitize filename"""
+    if s.isascii():
+        return s.translate(_FILENAME_DELETE).strip("_") or "x"
+    # Non-ASCII letters (e.g. accented city names) are kept, as isalnum() allows
     return "".join(c for c in s if c.isalnum() or c in ("-", "_")).strip("_") or "x"
 
 
@@ -363,12 +600,20 @@ def main():
     state = STATE
     
     # Support command line arguments
-    if len(sys.argv) >= 3:
-        city = sys.argv[1]
-        state = sys.argv[2]
+    args = sys.argv[1:]
+    log_level = "INFO"
+    if "--log-level" in args:
+        i = args.index("--log-level")
+        log_level = args[i + 1].upper() if i + 1 < len(args) else log_level
+        del args[i:i + 2]
+    logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
     
-    # Execute query
-    records = fetch_all_multilevel(city, state)
+    if "--no-cache" in args:
+        args.remove("--no-cache")
+        clear_cache()
+    if len(args) >= 2:
+        city = args[0]
+        state = args[1]
     
     # Generate output filename
     if OUTPUT_FILE:
@@ -376,8 +621,9 @@ def main():
     else:
         out = f"npi_doctors_{sanitize_filename(city)}_{sanitize_filename(state)}_multilevel.json"
     
-    write_json(records, out)
-    print(f"[Complete] Saved {len(records)} records to {out}")
+    # Execute query, streaming records to disk as they arrive
+    count = write_json(fetch_all_multilevel(city, state), out)
+    logger.info("[Complete] Saved %d records to %s", count, out)
 
 
 if __name__ == "__main__":